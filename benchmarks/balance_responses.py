@@ -0,0 +1,107 @@
+"""
+Compares serializing balances with BalanceResponse to the default FastAPI path,
+which validates every WealthItem against the response model before encoding it with json,
+the size of the items and the columnar format, and the time to the first chunk of a streamed response.
+
+Run with `python -m benchmarks.balance_responses --days 20000`
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+from datetime import date
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from wealth.database.models import BalanceSeries
+from wealth.parameters.constants import Currency
+from wealth.parameters.general import Aggregation, BalanceFormat, Resolution
+from wealth.util.query import BalanceQuery
+from wealth.util.responses import BalanceStreamingResponse, SelectedBalances
+from wealth.util.types import WealthItem
+
+
+async def legacy_render(series: BalanceSeries) -> bytes:
+    field = create_response_field(name="balances", type_=list[WealthItem])
+    content = await serialize_response(field=field, response_content=series.to_items())
+    return JSONResponse(content).body
+
+
+async def fast_render(series: BalanceSeries) -> bytes:
+    return _query(BalanceFormat.items).respond([SelectedBalances(series.currency, *series.select())]).body
+
+
+async def columnar_render(series: BalanceSeries) -> bytes:
+    return _query(BalanceFormat.columnar).respond([SelectedBalances(series.currency, *series.select())]).body
+
+
+async def streamed_render(series: BalanceSeries) -> bytes:
+    return b"".join([chunk async for chunk in _stream(series).body_iterator])
+
+
+async def first_chunk(series: BalanceSeries) -> bytes:
+    async for chunk in _stream(series).body_iterator:
+        return chunk
+    return b""
+
+
+def _stream(series: BalanceSeries) -> BalanceStreamingResponse:
+    async def balances():
+        yield series
+
+    response = _query(BalanceFormat.items).stream(balances())
+    assert isinstance(response, BalanceStreamingResponse)
+    return response
+
+
+def _query(balance_format: BalanceFormat) -> BalanceQuery:
+    return BalanceQuery(
+        start=None,
+        end=None,
+        resolution=Resolution.daily,
+        aggregation=Aggregation.last,
+        balance_format=balance_format,
+        etag=None,
+    )
+
+
+async def run(days: int, repeat: int):
+    start = date.today().toordinal() - days + 1
+    amounts = np.random.default_rng(0).uniform(0, 10_000, days).round(2)
+    series = BalanceSeries(start, Currency.USD, amounts, amounts / 1.1)
+
+    timings = {}
+    for name, render in (
+        ("legacy", legacy_render),
+        ("fast", fast_render),
+        ("columnar", columnar_render),
+        ("streamed", streamed_render),
+        ("first chunk", first_chunk),
+    ):
+        begin = time.perf_counter()
+        for _ in range(repeat):
+            body = await render(series)
+        timings[name] = ((time.perf_counter() - begin) / repeat, body)
+
+    assert json.loads(timings["legacy"][1]) == json.loads(timings["fast"][1]), "The responses differ"
+    assert timings["streamed"][1] == timings["fast"][1], "The streamed response differs"
+    print(f"{days} balances, {len(timings['fast'][1]) / 1024:.0f} KiB")
+    print(f"legacy:     {timings['legacy'][0]:8.4f}s")
+    print(f"fast:       {timings['fast'][0]:8.4f}s")
+    print(f"speedup:    {timings['legacy'][0] / timings['fast'][0]:8.1f}x")
+    print(f"columnar:   {timings['columnar'][0]:8.4f}s, {len(timings['columnar'][1]) / 1024:.0f} KiB")
+    print(f"streamed:   {timings['streamed'][0]:8.4f}s, first chunk after {timings['first chunk'][0]:.4f}s")
+    for name in ("fast", "columnar"):
+        print(f"{name} gzipped: {len(gzip.compress(timings[name][1])) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.days, args.repeat))
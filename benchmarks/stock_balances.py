@@ -0,0 +1,114 @@
+"""
+Compares the vectorized populate_stock_balances with the previous day by day implementation.
+
+Run with `python -m benchmarks.stock_balances --years 20`
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+
+from wealth.database.models import StockPosition, StockTicker, StockTickerItem, WealthItem
+from wealth.integrations.exchangeratesapi.dependency import Exchanger
+from wealth.integrations.exchangeratesapi.parameters import EXCHANGE_RATE_MAX_ATTEMPTS
+from wealth.parameters.constants import Currency
+from wealth.stocks import logic
+from wealth.util.conversion import get_rate_at_date
+from wealth.util.timeseries import DailySeries
+
+
+async def legacy_populate_stock_balances(position: StockPosition) -> list[WealthItem]:
+    ticker = await logic.get_or_create_stock_ticker(position.ticker)
+    current_date = position.start_date.date()
+    today = date.today()
+    balances: list[WealthItem] = []
+    last_amount = None
+    while current_date <= today:
+        ticker_position = get_rate_at_date(ticker.get_rates_in_dict(), current_date)
+        if ticker_position is not None:
+            new_amount = position.amount * ticker_position
+            balances.append(
+                WealthItem(
+                    date=current_date,  # type: ignore[arg-type]
+                    amount=new_amount,
+                    amount_in_euro=await logic.rates.convert_to_euros_on_date(new_amount, ticker.currency, current_date),
+                    currency=ticker.currency,
+                )
+            )
+            last_amount = new_amount
+        elif last_amount is not None:
+            balances.append(
+                WealthItem(
+                    date=current_date,  # type: ignore[arg-type]
+                    amount=last_amount,
+                    amount_in_euro=await logic.rates.convert_to_euros_on_date(last_amount, ticker.currency, current_date),
+                    currency=ticker.currency,
+                )
+            )
+        current_date += timedelta(days=1)
+    return balances
+
+
+def business_days(start: date, end: date) -> list[date]:
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    return [d for d in days if d.weekday() < 5]
+
+
+def generate_ticker(start: date, end: date) -> StockTicker:
+    days = business_days(start, end)
+    rates = [StockTickerItem(date=d, price=100 + (i % 250) / 10) for i, d in enumerate(days)]  # type: ignore[arg-type]
+    return StockTicker.construct(symbol="BENCH", currency=Currency.USD, rates=rates)
+
+
+def set_exchange_rates(start: date, end: date):
+    days = business_days(start, end)
+    Exchanger._rates = {  # pylint: disable=protected-access
+        Currency.USD: DailySeries.from_observations(
+            np.array([d.toordinal() for d in days]),
+            np.array([1.1 + (i % 100) / 1000 for i, _ in enumerate(days)]),
+            max_attempts=EXCHANGE_RATE_MAX_ATTEMPTS,
+        )
+    }
+    Exchanger.last_checked = datetime.now()
+
+
+async def populate_balance_items(position: StockPosition) -> list[WealthItem]:
+    """The balances as the API returns them, so both sides include building the WealthItems"""
+    return (await logic.populate_stock_balances(position)).to_items()
+
+
+async def timed(function, position: StockPosition) -> tuple[float, list[WealthItem]]:
+    start = time.perf_counter()
+    balances = await function(position)
+    return time.perf_counter() - start, balances
+
+
+async def run(years: int):
+    today = date.today()
+    start = today - timedelta(days=365 * years)
+    ticker = generate_ticker(start - timedelta(days=30), today)
+    set_exchange_rates(start - timedelta(days=30), today)
+    position = StockPosition(ticker=ticker.symbol, amount=12.5, start_date=start)  # type: ignore[arg-type]
+
+    async def get_ticker(_symbol: str) -> StockTicker:
+        return ticker
+
+    with patch.object(logic, "get_or_create_stock_ticker", get_ticker):
+        new_time, new_balances = await timed(populate_balance_items, position)
+        legacy_time, legacy_balances = await timed(legacy_populate_stock_balances, position)
+
+    assert new_balances == legacy_balances, "The vectorized balances differ from the legacy balances"
+    print(f"{years} years, {len(new_balances)} balances, {len(ticker.rates)} prices")
+    print(f"legacy:     {legacy_time:8.3f}s")
+    print(f"vectorized: {new_time:8.3f}s")
+    print(f"speedup:    {legacy_time / new_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.years))
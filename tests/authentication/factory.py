@@ -1,5 +1,12 @@
+from typing import Callable, Type
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
 from tests.factory import pydantic_model_generator
+from wealth.authentication import get_authenticated_projection, get_authenticated_user, get_cached_user
 from wealth.authentication.models import CreateUser
+from wealth.database.models import User, UserAccounts, UserCustomAssets, UserStockPositions, UserVersion
 
 _create_user_defaults = {
     "email": "test@test.com",
@@ -10,3 +17,22 @@ _create_user_defaults = {
 }
 
 generate_create_user = pydantic_model_generator(CreateUser, _create_user_defaults)
+
+
+def authenticate(app: FastAPI, user: User):
+    """
+    Makes the routes of the app run as the user without a JWT,
+    also for the routes that use the cached user or only load a projection of it
+    """
+    app.dependency_overrides[get_authenticated_user] = lambda: user
+    app.dependency_overrides[get_cached_user] = lambda: user
+    projections: tuple[Type[BaseModel], ...] = (UserAccounts, UserStockPositions, UserCustomAssets, UserVersion)
+    for projection in projections:
+        app.dependency_overrides[get_authenticated_projection(projection)] = _project(user, projection)
+
+
+def _project(user: User, projection: Type[BaseModel]) -> Callable[[], BaseModel]:
+    def get_projection() -> BaseModel:
+        return projection.parse_obj(user.dict(by_alias=True))
+
+    return get_projection
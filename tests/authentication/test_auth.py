@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import patch
 
 import httpx
@@ -8,7 +9,15 @@ from fastapi_jwt_auth.exceptions import JWTDecodeError, MissingTokenError
 from tests.authentication.factory import generate_create_user
 from tests.database.factory import generate_user
 from wealth.authentication.models import CreateUser, LoginUser
-from wealth.authentication.passwords import check_password, encode_password, validate_password
+from wealth.authentication.passwords import (
+    PasswordPool,
+    check_password,
+    encode_password,
+    hash_password,
+    password_pool,
+    validate_password,
+    verify_password,
+)
 from wealth.authentication.wealth_jwt import WealthJwt
 from wealth.database.models import User
 from wealth.main import app
@@ -103,6 +112,37 @@ class TestPasswords:
         encoded = encode_password(original)
         assert check_password(to_check, encoded) == valid
 
+    @pytest.mark.asyncio
+    async def test_hash_and_verify_password_on_the_pool(self):
+        calls = password_pool.calls
+        encoded = await hash_password("original")
+
+        assert await verify_password("original", encoded)
+        assert not await verify_password("different", encoded)
+        assert password_pool.calls == calls + 3
+        assert password_pool.stats()["hash_time"] > 0
+
+    @pytest.mark.asyncio
+    async def test_password_pool_is_bounded(self):
+        pool = PasswordPool(1)
+        encoded = encode_password("original")
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.gather(*[pool.run(check_password, "original", encoded) for _ in range(3)])
+        ticker.cancel()
+
+        assert ticks > 3
+        assert pool.stats()["calls"] == 3
+        assert pool.stats()["pending"] == 0
+        assert pool.max_queue_wait >= pool.max_hash_time * 0.5
+
 
 class TestAuthViews:
     @pytest.mark.asyncio
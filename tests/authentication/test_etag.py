@@ -0,0 +1,56 @@
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from tests.authentication.factory import authenticate
+from tests.database.factory import generate_user
+from wealth.authentication.etag import etag_matches, make_etag
+
+
+def test_make_etag_changes_with_the_data_version_query_and_day():
+    etag = make_etag("user", 1, "/stocks/balances", "", date(2020, 1, 1))
+
+    assert etag.startswith('W/"')
+    assert etag == make_etag("user", 1, "/stocks/balances", "", date(2020, 1, 1))
+    assert etag != make_etag("other", 1, "/stocks/balances", "", date(2020, 1, 1))
+    assert etag != make_etag("user", 2, "/stocks/balances", "", date(2020, 1, 1))
+    assert etag != make_etag("user", 1, "/stocks/balances", "format=columnar", date(2020, 1, 1))
+    assert etag != make_etag("user", 1, "/stocks/balances", "", date(2020, 1, 2))
+
+
+def test_etag_matches():
+    etag = 'W/"abc"'
+
+    assert etag_matches(etag, 'W/"abc"')
+    assert etag_matches(etag, '"abc"')
+    assert etag_matches(etag, 'W/"other", W/"abc"')
+    assert etag_matches(etag, "*")
+    assert not etag_matches(etag, "")
+    assert not etag_matches(etag, 'W/"other"')
+
+
+@pytest.mark.asyncio
+async def test_balances_are_not_modified_until_the_user_is_saved(
+    app_fixture: FastAPI, local_database
+):  # pylint: disable=unused-argument
+    user = generate_user()
+    await user.save()
+    authenticate(app_fixture, user)
+
+    async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
+        first = await client.get("/custom/balances")
+        etag = first.headers["ETag"]
+        not_modified = await client.get("/custom/balances", headers={"If-None-Match": etag})
+        other_format = await client.get("/custom/balances?format=columnar", headers={"If-None-Match": etag})
+        await user.save()
+        saved = await client.get("/custom/balances", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert other_format.status_code == 200
+    assert saved.status_code == 200
+    assert saved.headers["ETag"] != etag
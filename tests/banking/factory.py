@@ -1,6 +1,6 @@
 from tests.factory import pydantic_model_generator
-from wealth.banking.types import WealthItem
 from wealth.parameters.constants import Currency
+from wealth.util.types import WealthItem
 
 _wealth_item_defaults = {
     "date": "2020-12-31",
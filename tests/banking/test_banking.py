@@ -1,24 +1,29 @@
 import uuid
+from datetime import date
 
 import httpx
 import pytest
 from fastapi import FastAPI
 from fastapi.encoders import jsonable_encoder
 
+from tests.authentication.factory import authenticate
 from tests.database.factory import generate_account, generate_user, generate_wealth_item
-from wealth.authentication import get_authenticated_user
 from wealth.banking.types import UpdateAccountResponse
+from wealth.database.balances import save_balances
+from wealth.parameters.constants import Currency
 
 
 class TestBankingViews:
     @pytest.mark.asyncio
-    async def test_get_balances(self, app_fixture: FastAPI):
+    async def test_get_balances(self, app_fixture: FastAPI, local_database):  # pylint: disable=unused-argument
         number_of_balances = 5
-        balances = [generate_wealth_item() for _ in range(number_of_balances)]
+        balances = [generate_wealth_item(date=date(2020, 12, i + 1)) for i in range(number_of_balances)]
         account = generate_account(balances=balances)
         user = generate_user(accounts=[account])
+        await user.save()
+        await save_balances(user, account.asset_id, account.balances)
 
-        app_fixture.dependency_overrides[get_authenticated_user] = lambda: user
+        authenticate(app_fixture, user)
 
         async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
             response = await client.get("/banking/balances")
@@ -28,6 +33,24 @@ class TestBankingViews:
         assert len(data) == number_of_balances
         assert "amount_in_euro" in data[0]
 
+    @pytest.mark.asyncio
+    async def test_get_balances_order(self, app_fixture: FastAPI, local_database):  # pylint: disable=unused-argument
+        without_balances = generate_account(asset_id=uuid.uuid4(), currency=Currency.USD)
+        balances = [generate_wealth_item(date=date(2020, 12, i + 1)) for i in range(3)]
+        with_balances = generate_account(asset_id=uuid.uuid4(), balances=balances)
+        user = generate_user(accounts=[without_balances, with_balances])
+        await user.save()
+        await save_balances(user, with_balances.asset_id, with_balances.balances)
+
+        authenticate(app_fixture, user)
+
+        async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
+            response = await client.get("/banking/balances", params={"format": "columnar"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [(d["currency"], len(d["dates"])) for d in data] == [("USD", 0), ("EUR", 3)]
+
     @pytest.mark.asyncio
     async def test_get_balances_not_auth(self, app_fixture: FastAPI):
         async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
@@ -41,7 +64,7 @@ class TestBankingViews:
         accounts = [generate_account() for _ in range(number_of_accounts)]
         user = generate_user(accounts=accounts)
 
-        app_fixture.dependency_overrides[get_authenticated_user] = lambda: user
+        authenticate(app_fixture, user)
 
         async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
             response = await client.get("/banking/accounts")
@@ -65,7 +88,7 @@ class TestBankingViews:
         accounts = [generate_account(account_id=uuid.uuid4()) for _ in range(number_of_accounts - 1)] + [one_account]
         user = generate_user(accounts=accounts)
 
-        app_fixture.dependency_overrides[get_authenticated_user] = lambda: user
+        authenticate(app_fixture, user)
 
         async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
             response = await client.get(f"/banking/accounts/{external_id}")
@@ -84,18 +107,23 @@ class TestBankingViews:
         assert response.status_code == 401
 
     @pytest.mark.asyncio
-    async def test_get_account_balances(self, app_fixture: FastAPI):
+    async def test_get_account_balances(self, app_fixture: FastAPI, local_database):  # pylint: disable=unused-argument
         number_of_account_balances = 7
-        account_balances = [generate_wealth_item() for _ in range(number_of_account_balances)]
+        account_balances = [generate_wealth_item(date=date(2020, 12, i + 1)) for i in range(number_of_account_balances)]
         number_of_other_account_balances = 5
-        other_account_balances = [generate_wealth_item() for _ in range(number_of_other_account_balances)]
+        other_account_balances = [
+            generate_wealth_item(date=date(2020, 12, i + 1)) for i in range(number_of_other_account_balances)
+        ]
 
         account_id = uuid.uuid4()
-        account = generate_account(account_id=account_id, balances=account_balances)
-        other_account = generate_account(balances=other_account_balances)
+        account = generate_account(asset_id=uuid.uuid4(), account_id=account_id, balances=account_balances)
+        other_account = generate_account(asset_id=uuid.uuid4(), balances=other_account_balances)
         user = generate_user(accounts=[account, other_account])
+        await user.save()
+        for a in user.accounts:
+            await save_balances(user, a.asset_id, a.balances)
 
-        app_fixture.dependency_overrides[get_authenticated_user] = lambda: user
+        authenticate(app_fixture, user)
 
         async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
             response = await client.get(f"/banking/accounts/{account_id}/balances")
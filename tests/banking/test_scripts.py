@@ -0,0 +1,33 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+
+from tests.database.factory import generate_account, generate_user, generate_wealth_item
+from wealth.banking.scripts import move_account_balances_to_collection
+from wealth.database.balances import load_balances, save_balances
+from wealth.database.models import User
+
+
+@pytest.mark.asyncio
+async def test_move_account_balances_keeps_stored_balances(local_database):  # pylint: disable=unused-argument
+    embedded, refreshed = generate_account(asset_id=uuid.uuid4()), generate_account(asset_id=uuid.uuid4())
+    user = generate_user(accounts=[embedded, refreshed])
+    await user.save()
+    version = user.data_version
+    # As the accounts used to be stored, before the balances moved to their own collection
+    legacy_balances = [{"date": datetime(2020, 12, 1), "amount": 100, "amount_in_euro": 100, "currency": "EUR"}]
+    await User.get_motor_collection().update_one({"_id": user.id}, {"$set": {"accounts.$[].balances": legacy_balances}})
+    fresh_balances = generate_account(balances=[generate_wealth_item(date=date(2020, 12, 2), amount=200)]).balances
+    await save_balances(user, refreshed.asset_id, fresh_balances)
+
+    await move_account_balances_to_collection()
+
+    assert user.id is not None
+    balances = await load_balances(user.id, [embedded.asset_id, refreshed.asset_id])
+    assert balances[embedded.asset_id].amount.tolist() == [100]
+    assert balances[refreshed.asset_id] == fresh_balances
+    assert not await User.find({"accounts.balances": {"$exists": True}}).count()
+    stored = await User.get(user.id)
+    assert stored is not None
+    assert stored.data_version == version + 1
@@ -5,9 +5,18 @@ import pytest
 import time_machine
 
 from tests.database.factory import generate_custom_asset
-from wealth.custom_assets.logic import populate_asset_balances, rates
+from wealth.custom_assets import logic
+from wealth.custom_assets.cache import balance_cache
+from wealth.custom_assets.logic import (
+    calculate_asset_amounts,
+    calculate_last_asset_amount,
+    materialize_balances,
+    populate_asset_balances,
+    rates,
+)
 from wealth.database.models import AssetEvent, WealthItem
 from wealth.parameters.constants import Currency
+from wealth.util.timeseries import day_axis
 
 CURRENT_DATE = date(2020, 2, 15)
 
@@ -49,13 +58,13 @@ async def test_populate_asset_balances():
         WealthItem(currency=Currency.GBP, date=datetime(2020, 2, 15), amount=600, amount_in_euro=600 * exchange_rate),
     ]
 
-    async def convert_mock(a, _c, _d):
-        return a * exchange_rate
+    def convert_mock(amounts, _c, _d):
+        return amounts * exchange_rate
 
-    with patch.object(rates, "convert_to_euros_on_date", convert_mock):
+    with patch.object(rates, "update_exchange_rates"), patch.object(rates, "convert_series_to_euros", convert_mock):
         balances = await populate_asset_balances(asset)
 
-    assert balances == expected
+    assert balances.to_items() == expected
 
 
 @pytest.mark.asyncio
@@ -86,13 +95,13 @@ async def test_populate_asset_balances_one_event():
         WealthItem(currency=Currency.GBP, date=datetime(2020, 2, 15), amount=500, amount_in_euro=500 * exchange_rate),
     ]
 
-    async def convert_mock(a, _c, _d):
-        return a * exchange_rate
+    def convert_mock(amounts, _c, _d):
+        return amounts * exchange_rate
 
-    with patch.object(rates, "convert_to_euros_on_date", convert_mock):
+    with patch.object(rates, "update_exchange_rates"), patch.object(rates, "convert_series_to_euros", convert_mock):
         balances = await populate_asset_balances(asset)
 
-    assert balances == expected
+    assert balances.to_items() == expected
 
 
 @pytest.mark.asyncio
@@ -105,10 +114,63 @@ async def test_populate_asset_balances_no_events():
 
     expected = []
 
-    async def convert_mock(a, _c, _d):
-        return a * exchange_rate
+    def convert_mock(amounts, _c, _d):
+        return amounts * exchange_rate
 
-    with patch.object(rates, "convert_to_euros_on_date", convert_mock):
+    with patch.object(rates, "update_exchange_rates"), patch.object(rates, "convert_series_to_euros", convert_mock):
         balances = await populate_asset_balances(asset)
 
-    assert balances == expected
+    assert balances.to_items() == expected
+
+
+def test_calculate_asset_amounts_future_event():
+    events = [
+        AssetEvent(date=datetime(2020, 2, 20), amount=600),
+        AssetEvent(date=datetime(2020, 2, 10), amount=500),
+    ]
+
+    days, amounts = calculate_asset_amounts(events, CURRENT_DATE)
+
+    # The run before an upcoming event lasts until that event, the upcoming event itself is not shown yet
+    assert days.tolist() == day_axis(date(2020, 2, 10), date(2020, 2, 19)).tolist()
+    assert amounts.tolist() == [500] * 10
+
+
+@pytest.mark.asyncio
+@time_machine.travel(CURRENT_DATE)
+async def test_materialize_balances_is_cached_per_version():
+    balance_cache.clear()
+    asset = generate_custom_asset(currency=Currency.EUR, events=[AssetEvent(date=datetime(2020, 2, 1), amount=500)])
+
+    with patch.object(logic, "populate_asset_balances", wraps=populate_asset_balances) as populate:
+        first = await materialize_balances(asset)
+        assert await materialize_balances(asset) is first
+        assert populate.call_count == 1
+
+        asset.events.append(AssetEvent(date=datetime(2020, 2, 10), amount=600))
+        asset.version += 1
+        second = await materialize_balances(asset)
+        assert populate.call_count == 2
+
+    assert asset.balances is second
+    assert asset.current_value == 600
+    assert "balances" not in asset.dict()
+
+
+@pytest.mark.parametrize(
+    "events",
+    [
+        [],
+        [AssetEvent(date=datetime(2020, 1, 1), amount=100), AssetEvent(date=datetime(2020, 2, 1), amount=200)],
+        [AssetEvent(date=datetime(2020, 2, 1), amount=200), AssetEvent(date=datetime(2020, 2, 1), amount=300)],
+        [AssetEvent(date=datetime(2020, 2, 10), amount=500), AssetEvent(date=datetime(2020, 2, 20), amount=600)],
+        [AssetEvent(date=datetime(2020, 2, 20), amount=600)],
+    ],
+)
+def test_calculate_last_asset_amount_is_the_last_of_calculate_asset_amounts(events):
+    days, amounts = calculate_asset_amounts(events, CURRENT_DATE)
+
+    last_days, last_amounts = calculate_last_asset_amount(events, CURRENT_DATE)
+
+    assert last_days.tolist() == days[-1:].tolist()
+    assert last_amounts.tolist() == amounts[-1:].tolist()
@@ -2,7 +2,7 @@ import uuid
 
 from tests.factory import SpecialCaseDict, database_model_generator
 from wealth.authentication.passwords import encode_password
-from wealth.database.models import Account, CustomAsset, User, WealthItem
+from wealth.database.models import Account, CustomAsset, StockPosition, User, WealthItem
 from wealth.parameters.constants import Currency
 from wealth.parameters.general import AccountSource
 
@@ -43,3 +43,13 @@ _custom_assets_defaults = {
     "description": "description-1",
 }
 generate_custom_asset = database_model_generator(CustomAsset, _custom_assets_defaults)
+
+_stock_position_defaults = {
+    "asset_id": uuid.uuid4(),
+    "position_id": uuid.uuid4(),
+    "amount": 10,
+    "currency": Currency.USD,
+    "start_date": "2020-01-01",
+    "ticker": "AAPL",
+}
+generate_stock_position = database_model_generator(StockPosition, _stock_position_defaults)
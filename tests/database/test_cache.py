@@ -0,0 +1,109 @@
+import asyncio
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from tests.database.factory import generate_account
+from wealth.database.cache import UserCache
+from wealth.database.models import BalanceSeries, User
+from wealth.parameters.constants import Currency
+
+
+def _user(data_version: int = 1) -> User:
+    # Built without validation, as Documents can only be validated with an initialized database
+    return User.construct(
+        email="test@test.com",
+        password=b"",
+        first_name="Test first",
+        last_name="Test last",
+        accounts=[generate_account()],
+        data_version=data_version,
+    )
+
+
+class _Loader:
+    def __init__(self, user: User | None):
+        self.user = user
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, _: str) -> User | None:
+        self.calls += 1
+        await self.release.wait()
+        return self.user
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = UserCache(10, timedelta(minutes=1))
+    load = _Loader(_user())
+    load.release.clear()
+
+    pending = asyncio.gather(*[cache.get("test@test.com", load) for _ in range(3)])
+    await asyncio.sleep(0)
+    load.release.set()
+    users = await pending
+
+    assert load.calls == 1
+    assert await cache.get("test@test.com", load) is not None
+    assert load.calls == 1
+    assert cache.stats()["items"] == 1
+    assert len({id(u) for u in users}) == 3
+
+
+@pytest.mark.asyncio
+async def test_copies_do_not_share_balances():
+    cache = UserCache(10, timedelta(minutes=1))
+    load = _Loader(_user())
+
+    first = await cache.get("test@test.com", load)
+    assert first is not None
+    first.accounts[0].balances = BalanceSeries.from_arrays(np.array([738000]), np.ones(1), np.ones(1), Currency.EUR)
+    first.accounts.clear()
+    second = await cache.get("test@test.com", load)
+
+    assert second is not None
+    assert len(second.accounts) == 1
+    assert not second.accounts[0].balances
+
+
+@pytest.mark.asyncio
+async def test_load_started_before_an_invalidation_is_not_cached():
+    cache = UserCache(10, timedelta(minutes=1))
+    load = _Loader(_user())
+    load.release.clear()
+
+    pending = asyncio.ensure_future(cache.get("test@test.com", load))
+    await asyncio.sleep(0)
+    cache.invalidate("test@test.com")
+    load.release.set()
+    await pending
+    await cache.get("test@test.com", load)
+
+    assert load.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_outdated_users_are_invalidated():
+    cache = UserCache(10, timedelta(minutes=1))
+    load = _Loader(_user(data_version=1))
+    await cache.get("test@test.com", load)
+
+    cache.invalidate_outdated("test@test.com", 1)
+    await cache.get("test@test.com", load)
+    cache.invalidate_outdated("test@test.com", 2)
+    await cache.get("test@test.com", load)
+
+    assert load.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_users_are_not_cached():
+    cache = UserCache(10, timedelta(minutes=1))
+    load = _Loader(None)
+
+    assert await cache.get("test@test.com", load) is None
+    assert await cache.get("test@test.com", load) is None
+    assert load.calls == 2
@@ -0,0 +1,16 @@
+from wealth.database.explain import plan_stages
+
+
+def test_plan_stages():
+    plan = {
+        "stage": "FETCH",
+        "inputStage": {
+            "stage": "SORT_MERGE",
+            "inputStages": [
+                {"stage": "IXSCAN", "indexName": "user_id_1_asset_id_1_year_1"},
+                {"stage": "COLLSCAN"},
+            ],
+        },
+    }
+
+    assert plan_stages(plan) == ["FETCH", "SORT_MERGE", "IXSCAN(user_id_1_asset_id_1_year_1)", "COLLSCAN"]
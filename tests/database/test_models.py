@@ -0,0 +1,73 @@
+from datetime import date, datetime
+
+import bson
+import numpy as np
+from beanie.odm.utils.encoder import Encoder
+
+from tests.database.factory import generate_account, generate_wealth_item
+from wealth.database.models import BalanceBucket, BalanceSeries, WealthItem
+from wealth.parameters.constants import Currency
+from wealth.parameters.general import Aggregation, Resolution
+
+
+def test_balance_series_from_items_keeps_gaps():
+    items = [
+        generate_wealth_item(date=date(2020, 1, 3), amount=30, amount_in_euro=3),
+        generate_wealth_item(date=date(2020, 1, 1), amount=10, amount_in_euro=1),
+    ]
+
+    series = BalanceSeries.from_items(items)
+
+    assert series.start == date(2020, 1, 1).toordinal()
+    assert np.isnan(series.amount[1])
+    assert series.days.tolist() == [date(2020, 1, 1).toordinal(), date(2020, 1, 3).toordinal()]
+    assert series.to_items() == sorted(items, key=lambda i: i.date)
+
+
+def test_balance_series_bson_round_trip():
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 11).toordinal())
+    series = BalanceSeries.from_arrays(days, np.arange(10.0), np.arange(10.0) / 2, Currency.USD)
+
+    encoded = Encoder(custom_encoders=BalanceBucket.Collection.bson_encoders).encode({"balances": series})
+    decoded = BalanceSeries.validate(bson.decode(bson.encode(encoded))["balances"])
+
+    assert decoded == series
+    assert generate_account(balances=decoded).current_value_in_euro == 4.5
+    assert "balances" not in generate_account(balances=decoded).dict()
+
+
+def test_balance_series_split_by_year():
+    days = np.arange(date(2019, 12, 30).toordinal(), date(2021, 1, 3).toordinal())
+    series = BalanceSeries.from_arrays(days, days.astype(float), days.astype(float), Currency.EUR)
+
+    years = series.split_by_year()
+
+    assert list(years) == [2019, 2020, 2021]
+    assert [len(s) for s in years.values()] == [2, 366, 2]
+    assert BalanceSeries.concat(list(years.values())) == series
+
+
+def test_balance_series_validates_stored_lists():
+    stored = [{"date": datetime(2020, 1, 1), "amount": 10, "amount_in_euro": 5, "currency": "USD", "raw": "{}"}]
+
+    account = generate_account(balances=stored)
+
+    assert account.balances.currency == Currency.USD
+    assert account.balances.to_items() == [
+        WealthItem(date=datetime(2020, 1, 1), amount=10, amount_in_euro=5, currency=Currency.USD)
+    ]
+
+
+def test_balance_series_to_items_range_and_resolution():
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 4, 1).toordinal())
+    series = BalanceSeries.from_arrays(days, np.arange(days.size, dtype=float), np.zeros(days.size), Currency.EUR)
+
+    items = series.to_items(date(2020, 1, 15), date(2020, 3, 10), Resolution.monthly, Aggregation.last)
+
+    assert [(i.date, i.amount) for i in items] == [
+        (datetime(2020, 1, 31), 30),
+        (datetime(2020, 2, 29), 59),
+        (datetime(2020, 3, 10), 69),
+    ]
+    assert series.to_items(date(2021, 1, 1)) == []
+    assert series.to_items(end=date(2019, 1, 1)) == []
@@ -0,0 +1,78 @@
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from tests.database.factory import generate_account, generate_custom_asset, generate_stock_position, generate_user
+from wealth.database.models import BalanceSeries, User
+from wealth.database.users import bump_data_version, content_hash, pull_asset, push_asset, set_asset_fields
+from wealth.parameters.constants import Currency
+
+
+def test_content_hash_only_changes_with_the_stored_content():
+    account = generate_account()
+    # Built without validation, as Documents can only be validated with an initialized database
+    user = User.construct(email="test@test.com", password=b"", first_name="Test", last_name="Test", accounts=[account])
+    previous_hash = content_hash(user)
+
+    user.data_version += 1
+    account.balances = BalanceSeries.from_arrays(np.array([738000]), np.ones(1), np.ones(1), Currency.EUR)
+    assert content_hash(user) == previous_hash
+
+    account.is_active = False
+    assert content_hash(user) != previous_hash
+
+
+@pytest.mark.asyncio
+async def test_partial_updates(local_database):  # pylint: disable=unused-argument
+    account = generate_account(name="before")
+    position = generate_stock_position()
+    user = generate_user(accounts=[account], stock_positions=[position])
+    await user.save()
+    version = user.data_version
+
+    account.name = "after"
+    account.is_active = False
+    await set_asset_fields(user, account, ["name", "is_active"])
+    asset = generate_custom_asset()
+    await push_asset(user, asset)
+    await pull_asset(user, position)
+
+    stored = await User.get(user.id)
+    assert stored is not None
+    assert [(a.name, a.is_active) for a in stored.accounts] == [("after", False)]
+    assert [a.asset_id for a in stored.custom_assets] == [asset.asset_id]
+    assert not stored.stock_positions
+    assert stored.data_version == user.data_version == version + 3
+
+
+@pytest.mark.asyncio
+async def test_saving_an_outdated_user_bumps_the_stored_data_version(local_database):  # pylint: disable=unused-argument
+    user = generate_user(first_name="before")
+    await user.save()
+    outdated = await User.get(user.id)
+    assert outdated is not None
+    await bump_data_version(user)
+
+    outdated.first_name = "after"
+    await outdated.save()
+
+    stored = await User.get(user.id)
+    assert stored is not None
+    assert stored.first_name == "after"
+    assert stored.data_version == outdated.data_version == user.data_version + 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_asset_updates_increment_different_versions(local_database):  # pylint: disable=unused-argument
+    asset = generate_custom_asset(asset_id=uuid4())
+    user = generate_user(custom_assets=[asset])
+    await user.save()
+    concurrent = asset.copy()
+
+    await set_asset_fields(user, asset, ["description"], increment=["version"])
+    await set_asset_fields(user, concurrent, ["events"], increment=["version"])
+
+    stored = await User.get(user.id)
+    assert stored is not None
+    assert (asset.version, concurrent.version, stored.custom_assets[0].version) == (1, 2, 2)
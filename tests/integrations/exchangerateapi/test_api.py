@@ -2,6 +2,7 @@ import asyncio
 from datetime import date, datetime, timedelta
 from typing import Sequence
 
+import numpy as np
 import pytest
 
 from wealth.database.models import ExchangeRate, ExchangeRateItem
@@ -9,6 +10,8 @@ from wealth.integrations.exchangeratesapi.dependency import Exchanger
 from wealth.integrations.exchangeratesapi.exceptions import ExchangeRateApiRuntimeException
 from wealth.integrations.exchangeratesapi.parameters import DEFAULT_CONVERSION
 from wealth.parameters.constants import Currency
+from wealth.util.conversion import get_rate_at_date
+from wealth.util.timeseries import DailySeries, day_axis
 
 
 @pytest.fixture
@@ -20,6 +23,13 @@ def reset_exchanger():
     Exchanger._rates = {}  # pylint: disable=protected-access
 
 
+def assert_rates_match(retrieved_rates: dict[Currency, DailySeries], raw_rates: Sequence[ExchangeRate]):
+    assert retrieved_rates.keys() == {item.currency for item in raw_rates}
+    for item in raw_rates:
+        for rate_date, rate in item.get_rates_in_dict().items():
+            assert retrieved_rates[item.currency].at(rate_date.toordinal()) == rate
+
+
 @pytest.mark.usefixtures("reset_exchanger")
 class TestExchanger:
     async def set_fake_rates(self, local_database) -> Sequence[ExchangeRate]:  # pylint: disable=unused-argument
@@ -47,19 +57,17 @@ class TestExchanger:
     @pytest.mark.asyncio
     async def test_get_rates(self, local_database):
         raw_rates = await self.set_fake_rates(local_database)
-        converted_rates = {item.currency: item.get_rates_in_dict() for item in raw_rates}
 
         exchanger = Exchanger()
         retrieved_rates = await exchanger.get_rates()
 
-        assert retrieved_rates == converted_rates
+        assert_rates_match(retrieved_rates, raw_rates)
         assert Exchanger.last_checked is not None
         assert Exchanger.last_checked - datetime.now() < timedelta(minutes=1)
 
     @pytest.mark.asyncio
     async def test_get_rates_caching(self, local_database):
         raw_rates = await self.set_fake_rates(local_database)
-        converted_rates = {item.currency: item.get_rates_in_dict() for item in raw_rates}
 
         exchanger = Exchanger()
         retrieved_rates = await exchanger.get_rates()
@@ -68,19 +76,18 @@ class TestExchanger:
         last_updated = exchanger.last_checked
 
         assert last_updated == first_updated
-        assert retrieved_rates == converted_rates
+        assert_rates_match(retrieved_rates, raw_rates)
 
     @pytest.mark.asyncio
     async def test_get_rates_refresh(self, local_database):
         raw_rates = await self.set_fake_rates(local_database)
-        converted_rates = {item.currency: item.get_rates_in_dict() for item in raw_rates}
 
         exchanger = Exchanger()
         exchanger.last_checked = datetime.now() - timedelta(days=3)
         retrieved_rates = await exchanger.get_rates()
 
         assert exchanger.last_checked < datetime.now() - timedelta(minutes=1)
-        assert retrieved_rates == converted_rates
+        assert_rates_match(retrieved_rates, raw_rates)
 
     @pytest.mark.asyncio
     async def test_convert_to_euros_on_date(self, local_database):
@@ -146,3 +153,44 @@ class TestExchanger:
 
             assert currency in stringed_exc
             assert "not supported" in stringed_exc
+
+    @pytest.mark.asyncio
+    async def test_convert_series_to_euros(self):
+        raw_rates = {date(2020, 1, 1): 10.0, date(2020, 1, 3): 10.5, date(2020, 2, 10): 10.7}
+        Exchanger._rates = {  # pylint: disable=protected-access
+            Currency.SEK: DailySeries.from_observations(
+                np.array([d.toordinal() for d in raw_rates]), np.array(list(raw_rates.values())), max_attempts=14
+            )
+        }
+        Exchanger.last_checked = datetime.now()
+        currency = Currency.SEK
+        days = day_axis(date(2019, 12, 30), date(2020, 3, 1))
+        amounts = np.arange(len(days), dtype=np.float64)
+
+        exchanger = Exchanger()
+        converted = exchanger.convert_series_to_euros(amounts, currency, days)
+
+        expected = []
+        for amount, day in zip(amounts.tolist(), days.tolist()):
+            rate = get_rate_at_date(raw_rates, date.fromordinal(day))
+            expected.append(amount / (rate if rate is not None else DEFAULT_CONVERSION[currency]))
+            assert await exchanger.convert_to_euros_on_date(amount, currency, date.fromordinal(day)) == expected[-1]
+        assert converted.tolist() == expected
+
+    def test_convert_series_to_euros_eur(self):
+        days = day_axis(date(2020, 1, 1), date(2020, 1, 5))
+        amounts = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+
+        exchanger = Exchanger()
+        converted = exchanger.convert_series_to_euros(amounts, Currency.EUR, days)
+
+        assert np.array_equal(converted, amounts)
+
+    def test_convert_series_to_euros_not_loaded(self):
+        days = day_axis(date(2020, 1, 1), date(2020, 1, 5))
+
+        exchanger = Exchanger()
+        with pytest.raises(ExchangeRateApiRuntimeException) as exc:
+            exchanger.convert_series_to_euros(np.ones(5), Currency.SEK, days)
+
+        assert "not loaded" in str(exc.value)
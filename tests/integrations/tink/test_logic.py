@@ -1,4 +1,6 @@
+from datetime import date
 from unittest.mock import patch
+from uuid import uuid4
 
 import pytest
 
@@ -11,6 +13,7 @@ from tests.integrations.tink.factory import (
     generate_statistics_response_item,
     generate_user_response,
 )
+from wealth.database.balances import save_balances
 from wealth.database.models import Account, User, WealthItem
 from wealth.integrations.tink.exceptions import TinkRuntimeException
 from wealth.integrations.tink.logic import TinkLogic
@@ -266,8 +269,10 @@ class TestTinkLogic:
         new_account_id = "new-acc"
         source = AccountSource.tink
 
-        other_balances = [generate_wealth_item(account_id=other_account_id) for _ in range(5)]
-        original_refresh_balances = [generate_wealth_item(account_id=refresh_account_id) for _ in range(6)]
+        other_balances = [generate_wealth_item(account_id=other_account_id, date=date(2020, 12, i + 1)) for i in range(5)]
+        original_refresh_balances = [
+            generate_wealth_item(account_id=refresh_account_id, date=date(2020, 12, i + 1)) for i in range(6)
+        ]
 
         other_account = generate_db_account(source=source, external_id=other_account_id, balances=other_balances)
         refresh_account = generate_db_account(source=source, external_id=refresh_account_id, balances=original_refresh_balances)
@@ -279,8 +284,12 @@ class TestTinkLogic:
         await user.save()
 
         get_accounts_response = [refresh_account, new_account]
-        response_refresh = [generate_wealth_item(source=source, account_id=refresh_account_id) for _ in range(7)]
-        response_new = [generate_wealth_item(source=source, account_id=new_account_id) for _ in range(8)]
+        response_refresh = [
+            generate_wealth_item(source=source, account_id=refresh_account_id, date=date(2020, 12, i + 1)) for i in range(7)
+        ]
+        response_new = [
+            generate_wealth_item(source=source, account_id=new_account_id, date=date(2020, 12, i + 1)) for i in range(8)
+        ]
 
         async def _get_wealth_items_for_account(account):
             return response_new if account == new_account else response_refresh
@@ -298,6 +307,34 @@ class TestTinkLogic:
         assert result == user
         assert len(user.balances) == 20
 
+    @pytest.mark.asyncio
+    async def test_update_all_accounts_only_writes_changes(self, local_database):  # pylint: disable=unused-argument
+        external_ids = ["first-acc", "second-acc"]
+        user = generate_user(
+            accounts=[generate_db_account(asset_id=uuid4(), source=AccountSource.tink, external_id=i) for i in external_ids]
+        )
+        await user.save()
+        balances = {i: [generate_wealth_item(date=date(2020, 12, d + 1)) for d in range(3)] for i in external_ids}
+
+        async def _update():
+            accounts = [generate_db_account(source=AccountSource.tink, external_id=i) for i in external_ids]
+            async with TinkLogic() as logic:
+                with patch.object(logic, "get_accounts", return_value=accounts), patch.object(
+                    logic, "get_wealth_items_for_account", side_effect=lambda a: balances[a.external_id]
+                ), patch.object(User, "save", autospec=True, side_effect=User.save) as save, patch(
+                    "wealth.database.balances.save_balances", wraps=save_balances
+                ) as save_account_balances:
+                    await logic.update_all_accounts(user)
+            stored = await User.get(user.id)
+            assert stored is not None
+            return save.call_count, [c.args[1] for c in save_account_balances.call_args_list], stored.data_version
+
+        _, _, version = await _update()
+        assert await _update() == (0, [], version)
+
+        balances["second-acc"] = balances["second-acc"][:2]
+        assert await _update() == (0, [user.accounts[1].asset_id], version + 1)
+
     @pytest.mark.asyncio
     async def test_refresh_user_from_backend(self):
         user_id = "tink-user-id"
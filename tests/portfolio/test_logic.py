@@ -0,0 +1,30 @@
+from datetime import date
+
+import numpy as np
+
+from wealth.database.models import BalanceSeries
+from wealth.parameters.constants import Currency
+from wealth.portfolio.logic import calculate_net_worth
+
+
+def _series(first_day: date, amounts_in_euro: list[float]) -> BalanceSeries:
+    days = first_day.toordinal() + np.flatnonzero(~np.isnan(amounts_in_euro))
+    known = np.array(amounts_in_euro)[~np.isnan(amounts_in_euro)]
+    return BalanceSeries.from_arrays(days, known * 2, known, Currency.USD)
+
+
+def test_calculate_net_worth():
+    account = _series(date(2020, 1, 1), [10, 20, np.nan, 40])
+    position = _series(date(2020, 1, 3), [100, 200, 300])
+
+    net_worth = calculate_net_worth([account, position, BalanceSeries.empty()])
+
+    assert net_worth.start == date(2020, 1, 1).toordinal()
+    assert net_worth.currency == Currency.EUR
+    # The account carries 20 over the 3rd, and 40 over the 5th
+    assert net_worth.amount_in_euro.tolist() == [10, 20, 120, 240, 340]
+    assert net_worth.amount.tolist() == net_worth.amount_in_euro.tolist()
+
+
+def test_calculate_net_worth_without_balances():
+    assert not calculate_net_worth([])
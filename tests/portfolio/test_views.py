@@ -0,0 +1,88 @@
+import uuid
+from datetime import date, datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+import time_machine
+from fastapi import FastAPI
+
+from tests.authentication.factory import authenticate
+from tests.database.factory import (
+    generate_account,
+    generate_custom_asset,
+    generate_stock_position,
+    generate_user,
+    generate_wealth_item,
+)
+from wealth.custom_assets import logic as custom_asset_logic
+from wealth.custom_assets.cache import balance_cache as asset_balance_cache
+from wealth.database.balances import save_balances
+from wealth.database.models import AssetEvent, StockTicker, StockTickerItem
+from wealth.parameters.constants import Currency
+from wealth.stocks import logic as stock_logic
+from wealth.stocks.cache import balance_cache as position_balance_cache
+from wealth.stocks.cache import ticker_cache
+
+CURRENT_DATE = date(2020, 3, 15)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in (ticker_cache, position_balance_cache, asset_balance_cache):
+        cache.clear()
+    yield
+    for cache in (ticker_cache, position_balance_cache, asset_balance_cache):
+        cache.clear()
+
+
+class TestPortfolioViews:
+    @pytest.mark.asyncio
+    @time_machine.travel(CURRENT_DATE)
+    async def test_get_net_worth(self, app_fixture: FastAPI, local_database):  # pylint: disable=unused-argument
+        balances = [
+            generate_wealth_item(date=date(2020, 1, 1), amount=100, amount_in_euro=100),
+            generate_wealth_item(date=date(2020, 2, 1), amount=200, amount_in_euro=200),
+        ]
+        account = generate_account(asset_id=uuid.uuid4(), balances=balances)
+        position = generate_stock_position(asset_id=uuid.uuid4(), amount=10, start_date=datetime(2020, 1, 1))
+        asset = generate_custom_asset(asset_id=uuid.uuid4(), events=[AssetEvent(date=datetime(2020, 2, 1), amount=1000)])
+        user = generate_user(accounts=[account], stock_positions=[position], custom_assets=[asset])
+        await user.save()
+        await save_balances(user, account.asset_id, account.balances)
+        ticker = StockTicker.construct(
+            symbol=position.ticker,
+            currency=Currency.USD,
+            rates=[
+                StockTickerItem(date=datetime(2020, 1, 1), price=100),
+                StockTickerItem(date=datetime(2020, 2, 3), price=110),
+            ],
+        )
+
+        authenticate(app_fixture, user)
+
+        with patch.object(stock_logic, "get_or_create_stock_ticker", return_value=ticker), patch.object(
+            stock_logic.rates, "update_exchange_rates"
+        ), patch.object(
+            stock_logic.rates, "convert_series_to_euros", lambda amounts, _currency, _days: amounts / 2
+        ), patch.object(
+            custom_asset_logic.rates, "update_exchange_rates"
+        ), patch.object(
+            custom_asset_logic.rates, "convert_series_to_euros", lambda amounts, _currency, _days: amounts
+        ):
+            async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
+                response = await client.get(
+                    "/portfolio/net-worth", params={"from": "2020-01-15", "resolution": "monthly", "format": "columnar"}
+                )
+
+        assert response.status_code == 200
+        # The account, the position at half its dollar value, and the asset from February on, at the end of each month
+        assert response.json() == [
+            {
+                "currency": "EUR",
+                "start": "2020-01-31",
+                "dates": [0, 29, 44],
+                "amount": [600, 1750, 1750],
+                "amount_in_euro": [600, 1750, 1750],
+            }
+        ]
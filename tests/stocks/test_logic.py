@@ -0,0 +1,220 @@
+import asyncio
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+import time_machine
+
+from tests.database.factory import generate_stock_position
+from wealth.database.models import StockTicker, StockTickerItem, WealthItem
+from wealth.parameters.constants import Currency
+from wealth.stocks import logic
+from wealth.stocks.cache import balance_cache, ticker_cache
+from wealth.stocks.logic import (
+    calculate_last_stock_amount,
+    calculate_stock_amounts,
+    get_ticker_prices,
+    materialize_balances,
+    populate_stock_balances,
+    rates,
+)
+from wealth.util.timeseries import day_axis
+
+CURRENT_DATE = date(2020, 1, 8)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    ticker_cache.clear()
+    balance_cache.clear()
+    yield
+    ticker_cache.clear()
+    balance_cache.clear()
+
+
+def _ticker(prices: dict[date, float]) -> StockTicker:
+    return StockTicker.construct(
+        symbol="AAPL",
+        currency=Currency.USD,
+        rates=[StockTickerItem(date=d, price=p) for d, p in prices.items()],  # type: ignore[arg-type]
+    )
+
+
+def test_calculate_stock_amounts_fills_weekends():
+    position = generate_stock_position(amount=10, start_date=datetime(2020, 1, 2))
+    ticker = _ticker({date(2020, 1, 3): 100, date(2020, 1, 6): 110})
+
+    days, amounts = calculate_stock_amounts(position, *ticker.get_rates_in_arrays(), date(2020, 1, 8))
+
+    # No price on or before the 2nd, so the position only starts on the 3rd
+    assert days.tolist() == day_axis(date(2020, 1, 3), date(2020, 1, 8)).tolist()
+    assert amounts.tolist() == [1000, 1000, 1000, 1100, 1100, 1100]
+
+
+def test_calculate_stock_amounts_carries_last_price_over_long_gaps():
+    position = generate_stock_position(amount=2, start_date=datetime(2020, 1, 1))
+    ticker = _ticker({date(2020, 2, 15): 30, date(2020, 1, 1): 20})
+
+    days, amounts = calculate_stock_amounts(position, *ticker.get_rates_in_arrays(), date(2020, 2, 16))
+
+    assert days.tolist() == day_axis(date(2020, 1, 1), date(2020, 2, 16)).tolist()
+    assert amounts.tolist() == [40] * 45 + [60, 60]
+
+
+def test_calculate_stock_amounts_no_recent_price():
+    position = generate_stock_position(amount=2, start_date=datetime(2020, 1, 1))
+    ticker = _ticker({date(2019, 12, 1): 20})
+
+    days, amounts = calculate_stock_amounts(position, *ticker.get_rates_in_arrays(), date(2020, 1, 8))
+
+    assert not days.size
+    assert not amounts.size
+
+
+@pytest.mark.asyncio
+@time_machine.travel(CURRENT_DATE)
+async def test_populate_stock_balances():
+    position = generate_stock_position(amount=10, start_date=datetime(2020, 1, 2))
+    ticker = _ticker({date(2020, 1, 3): 100, date(2020, 1, 6): 110})
+    exchange_rate = 0.8
+
+    expected = [
+        WealthItem(currency=Currency.USD, date=datetime(2020, 1, 3), amount=1000, amount_in_euro=1000 / exchange_rate),
+        WealthItem(currency=Currency.USD, date=datetime(2020, 1, 4), amount=1000, amount_in_euro=1000 / exchange_rate),
+        WealthItem(currency=Currency.USD, date=datetime(2020, 1, 5), amount=1000, amount_in_euro=1000 / exchange_rate),
+        WealthItem(currency=Currency.USD, date=datetime(2020, 1, 6), amount=1100, amount_in_euro=1100 / exchange_rate),
+        WealthItem(currency=Currency.USD, date=datetime(2020, 1, 7), amount=1100, amount_in_euro=1100 / exchange_rate),
+        WealthItem(currency=Currency.USD, date=datetime(2020, 1, 8), amount=1100, amount_in_euro=1100 / exchange_rate),
+    ]
+
+    async def get_ticker_mock(_symbol):
+        return ticker
+
+    def conversion_mock(amounts, _currency, _days):
+        return amounts / exchange_rate
+
+    with patch.object(logic, "get_or_create_stock_ticker", get_ticker_mock), patch.object(
+        rates, "update_exchange_rates"
+    ), patch.object(rates, "convert_series_to_euros", conversion_mock):
+        balances = await populate_stock_balances(position)
+
+    assert balances.to_items() == expected
+
+
+@pytest.mark.asyncio
+async def test_get_ticker_prices_is_cached():
+    ticker = _ticker({date(2020, 1, 3): 100, date(2020, 1, 6): 110})
+    hits, misses = ticker_cache.hits, ticker_cache.misses
+
+    with patch.object(logic, "get_or_create_stock_ticker", return_value=ticker) as get_or_create_stock_ticker:
+        first = await get_ticker_prices(ticker.symbol)
+        second = await get_ticker_prices(ticker.symbol)
+
+    get_or_create_stock_ticker.assert_called_once_with(ticker.symbol)
+    assert first is second
+    assert first.currency == Currency.USD
+    assert first.prices.tolist() == [100, 110]
+    assert ticker_cache.hits == hits + 1
+    assert ticker_cache.misses == misses + 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_ticker_loads_are_shared_and_dropped_once_done():
+    ticker = _ticker({date(2020, 1, 3): 100})
+    release = asyncio.Event()
+
+    async def get_ticker_mock(_symbol):
+        await release.wait()
+        return ticker
+
+    with patch.object(logic, "get_or_create_stock_ticker", side_effect=get_ticker_mock) as get_or_create_stock_ticker:
+        pending = asyncio.gather(*[get_ticker_prices(ticker.symbol) for _ in range(3)])
+        await asyncio.sleep(0)
+        release.set()
+        prices = await pending
+
+    get_or_create_stock_ticker.assert_called_once_with(ticker.symbol)
+    assert len({id(p) for p in prices}) == 1
+    assert not logic._loading_tickers  # pylint: disable=protected-access
+
+    ticker_cache.clear()
+    with patch.object(logic, "get_or_create_stock_ticker", side_effect=ValueError), pytest.raises(ValueError):
+        await get_ticker_prices(ticker.symbol)
+    assert not logic._loading_tickers  # pylint: disable=protected-access
+
+
+def test_update_rates_bumps_history_version_on_revisions():
+    ticker = _ticker({date(2020, 1, 3): 100, date(2020, 1, 6): 110})
+
+    ticker.update_rates(ticker.rates + [StockTickerItem(date=datetime(2020, 1, 7), price=120)])
+    assert ticker.history_version == 0
+
+    ticker.update_rates([StockTickerItem(date=datetime(2020, 1, 3), price=90)] + ticker.rates[1:])
+    assert ticker.history_version == 1
+
+
+@pytest.mark.asyncio
+@time_machine.travel(CURRENT_DATE)
+async def test_materialize_balances_is_shared_between_equal_positions():
+    ticker = _ticker({date(2020, 1, 3): 100, date(2020, 1, 6): 110})
+    position = generate_stock_position(amount=10, start_date=datetime(2020, 1, 2))
+    same_position = generate_stock_position(amount=10, start_date=datetime(2020, 1, 2))
+    other_position = generate_stock_position(amount=20, start_date=datetime(2020, 1, 2))
+
+    with patch.object(logic, "get_or_create_stock_ticker", return_value=ticker), patch.object(
+        rates, "update_exchange_rates"
+    ), patch.object(rates, "convert_series_to_euros", lambda amounts, _currency, _days: amounts), patch.object(
+        logic, "_calculate_stock_balances", wraps=logic._calculate_stock_balances  # pylint: disable=protected-access
+    ) as calculate:
+        balances = await materialize_balances(position)
+        assert await materialize_balances(same_position) is balances
+        assert calculate.call_count == 1
+
+        other_balances = await materialize_balances(other_position)
+        assert calculate.call_count == 2
+
+    assert position.current_value == 1100
+    assert other_balances.amount.tolist() == (2 * balances.amount).tolist()
+    assert "balances" not in position.dict()
+
+
+@pytest.mark.asyncio
+@time_machine.travel(CURRENT_DATE)
+async def test_materialize_balances_sees_appended_prices():
+    position = generate_stock_position(amount=10, start_date=datetime(2020, 1, 2))
+
+    with patch.object(rates, "update_exchange_rates"), patch.object(
+        rates, "convert_series_to_euros", lambda amounts, _currency, _days: amounts
+    ):
+        with patch.object(logic, "get_or_create_stock_ticker", return_value=_ticker({date(2020, 1, 3): 100})):
+            await materialize_balances(position)
+        # The daily scripts appended a price, which does not change the history version
+        ticker_cache.clear()
+        with patch.object(
+            logic, "get_or_create_stock_ticker", return_value=_ticker({date(2020, 1, 3): 100, date(2020, 1, 7): 120})
+        ):
+            balances = await materialize_balances(position)
+
+    assert balances.amount.tolist() == [1000] * 4 + [1200] * 2
+
+
+@pytest.mark.parametrize(
+    "start_date, prices",
+    [
+        (datetime(2020, 1, 2), {date(2020, 1, 3): 100, date(2020, 1, 6): 110}),
+        (datetime(2020, 1, 2), {date(2020, 1, 6): 110, date(2019, 12, 20): 90}),
+        (datetime(2020, 1, 1), {date(2019, 12, 1): 20}),
+        (datetime(2020, 1, 1), {date(2020, 1, 9): 20}),
+        (datetime(2020, 1, 9), {date(2020, 1, 3): 100}),
+        (datetime(2020, 1, 2), {}),
+    ],
+)
+def test_calculate_last_stock_amount_is_the_last_of_calculate_stock_amounts(start_date, prices):
+    position = generate_stock_position(amount=10, start_date=start_date)
+    ticker = _ticker(prices)
+
+    days, amounts = calculate_stock_amounts(position, *ticker.get_rates_in_arrays(), CURRENT_DATE)
+
+    last_days, last_amounts = calculate_last_stock_amount(position, *ticker.get_rates_in_arrays(), CURRENT_DATE)
+    assert last_days.tolist() == days[-1:].tolist()
+    assert last_amounts.tolist() == amounts[-1:].tolist()
@@ -0,0 +1,34 @@
+import uuid
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from tests.authentication.factory import authenticate
+from tests.database.factory import generate_stock_position
+from wealth.database.models import User
+from wealth.integrations.alphavantage.exceptions import TickerNotFoundException
+from wealth.stocks import views
+
+
+class TestStockViews:
+    @pytest.mark.asyncio
+    async def test_update_position_with_unknown_ticker(self, app_fixture: FastAPI):
+        position = generate_stock_position(position_id=uuid.uuid4(), ticker="UNKNOWN")
+        # Built without validation, as Documents can only be validated with an initialized database
+        user = User.construct(
+            email="test@test.com", password=b"", first_name="Test", last_name="Test", stock_positions=[position]
+        )
+
+        authenticate(app_fixture, user)
+
+        with patch.object(views, "materialize_balances", side_effect=TickerNotFoundException("UNKNOWN")), patch.object(
+            views, "set_asset_fields"
+        ) as set_asset_fields:
+            async with httpx.AsyncClient(app=app_fixture, base_url="http://test") as client:
+                response = await client.patch(f"/stocks/positions/{position.position_id}", json={"amount": 20})
+
+        assert response.status_code == 422
+        assert response.json()["detail"] == {"ticker": "Ticker symbol not found (UNKNOWN)"}
+        set_asset_fields.assert_not_called()
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import time_machine
+
+from wealth.util.cache import LruCache
+
+
+def _cache(max_bytes: int, max_age: timedelta | None = None) -> LruCache[str, bytes]:
+    return LruCache(max_bytes, len, max_age=max_age)
+
+
+def test_get_and_set():
+    cache = _cache(100)
+
+    assert cache.get("a") is None
+    cache.set("a", b"12345")
+
+    assert cache.get("a") == b"12345"
+    assert cache.current_bytes == 5
+    assert cache.stats() == {"hits": 1, "misses": 1, "items": 1, "bytes": 5}
+
+
+def test_evicts_least_recently_used():
+    cache = _cache(10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+
+    cache.set("c", b"1234")
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.current_bytes == 8
+
+
+def test_replacing_a_value_updates_the_size():
+    cache = _cache(10)
+    cache.set("a", b"1234")
+    cache.set("a", b"12")
+
+    assert len(cache) == 1
+    assert cache.current_bytes == 2
+
+
+def test_does_not_store_values_bigger_than_the_cache():
+    cache = _cache(10)
+    cache.set("a", b"1234")
+    cache.set("b", b"12345678901")
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.current_bytes == 4
+
+
+def test_invalidate():
+    cache = _cache(10)
+    cache.set("a", b"1234")
+
+    cache.invalidate("a")
+    cache.invalidate("not-present")
+
+    assert cache.get("a") is None
+    assert cache.current_bytes == 0
+
+
+def test_max_age():
+    cache = _cache(10, max_age=timedelta(hours=1))
+    with time_machine.travel(datetime(2020, 1, 1, 12), tick=False):
+        cache.set("a", b"1234")
+    with time_machine.travel(datetime(2020, 1, 1, 12, 59), tick=False):
+        assert cache.get("a") == b"1234"
+    with time_machine.travel(datetime(2020, 1, 1, 13, 1), tick=False):
+        assert cache.get("a") is None
+
+    assert cache.current_bytes == 0
+    assert cache.stats()["misses"] == 1
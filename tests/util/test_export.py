@@ -0,0 +1,77 @@
+import io
+from datetime import date
+from uuid import uuid4
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from wealth.database.models import BalanceSeries
+from wealth.parameters.constants import Currency
+from wealth.parameters.general import AssetType, ExportFormat
+from wealth.util.export import EXPORT_SCHEMA, AssetBalances, ExportStreamingResponse, to_record_batch
+
+
+async def _iterate(assets: list[AssetBalances]):
+    for asset in assets:
+        yield asset
+
+
+async def _read(response: ExportStreamingResponse) -> pa.Table:
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    if response.media_type == "application/vnd.apache.parquet":
+        return pq.read_table(io.BytesIO(body))
+    return pa.ipc.open_stream(body).read_all()
+
+
+def test_record_batch_skips_days_without_a_balance():
+    asset_id = uuid4()
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 4).toordinal())
+    amounts = np.array([1.0, np.nan, 3.0])
+    asset = AssetBalances(AssetType.account, asset_id, BalanceSeries.from_arrays(days, amounts, amounts / 2, Currency.USD))
+
+    batch = to_record_batch(asset)
+
+    assert batch.schema == EXPORT_SCHEMA
+    assert batch.to_pydict() == {
+        "asset_id": [str(asset_id)] * 2,
+        "asset_type": ["account"] * 2,
+        "date": [date(2020, 1, 1), date(2020, 1, 3)],
+        "amount": [1.0, 3.0],
+        "amount_in_euro": [0.5, 1.5],
+        "currency": ["USD"] * 2,
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("export_format", list(ExportFormat))
+async def test_export_contains_every_asset(export_format):
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 6).toordinal())
+    assets = [
+        AssetBalances(
+            AssetType.stock_position, uuid4(), BalanceSeries.from_arrays(days, np.arange(5.0), np.ones(5), Currency.USD)
+        ),
+        AssetBalances(AssetType.account, uuid4(), BalanceSeries.empty()),
+        AssetBalances(
+            AssetType.custom_asset, uuid4(), BalanceSeries.from_arrays(days[:2], np.ones(2), np.ones(2), Currency.EUR)
+        ),
+    ]
+
+    response = ExportStreamingResponse(_iterate(assets), export_format)
+    table = await _read(response)
+
+    assert table.schema == EXPORT_SCHEMA
+    assert table.num_rows == 7
+    assert table.column("asset_type").to_pylist() == ["stock_position"] * 5 + ["custom_asset"] * 2
+    assert table.column("asset_id").to_pylist()[-1] == str(assets[2].asset_id)
+    assert response.headers["Content-Disposition"].startswith("attachment")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("export_format", list(ExportFormat))
+async def test_empty_export_has_the_schema(export_format):
+    table = await _read(ExportStreamingResponse(_iterate([]), export_format))
+
+    assert table.schema == EXPORT_SCHEMA
+    assert table.num_rows == 0
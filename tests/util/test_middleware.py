@@ -0,0 +1,34 @@
+import gzip
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from wealth.util.middleware import EncodingAwareGZipMiddleware
+from wealth.util.responses import GzippedResponse
+
+BODY = b'{"balances":"' + b"x" * 1000 + b'"}'
+
+app = FastAPI()
+app.add_middleware(EncodingAwareGZipMiddleware)
+
+
+@app.get("/gzipped")
+def get_gzipped():
+    return GzippedResponse(gzip.compress(BODY))
+
+
+@app.get("/plain")
+def get_plain():
+    return JSONResponse({"balances": "x" * 1000})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/gzipped", "/plain"])
+async def test_encoding_aware_gzip_middleware_compresses_once(path):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == BODY
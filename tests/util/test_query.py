@@ -0,0 +1,82 @@
+from datetime import date
+
+import numpy as np
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from wealth.database.models import BalanceSeries
+from wealth.parameters.constants import Currency
+from wealth.parameters.general import Aggregation, BalanceFormat, Resolution
+from wealth.util.query import NEXT_CURSOR_HEADER, BalancePage, BalanceQuery, decode_cursor, encode_cursor
+
+
+def _query(resolution: Resolution = Resolution.daily) -> BalanceQuery:
+    return BalanceQuery(
+        start=None,
+        end=None,
+        resolution=resolution,
+        aggregation=Aggregation.last,
+        balance_format=BalanceFormat.items,
+        etag=None,
+    )
+
+
+def _pages(query: BalanceQuery, series: BalanceSeries, limit: int) -> list[list[str]]:
+    pages = []
+    cursor = None
+    while True:
+        response = query.respond_page(series, BalancePage(limit=limit, cursor=cursor))
+        pages.append([item["date"] for item in orjson.loads(response.body)])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_pages_are_newest_first_and_skip_gaps():
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 6).toordinal())
+    amounts = np.array([1.0, np.nan, 3.0, np.nan, 5.0])
+    series = BalanceSeries.from_arrays(days, amounts, amounts, Currency.EUR)
+
+    pages = _pages(_query(), series, limit=2)
+
+    assert pages == [["2020-01-05", "2020-01-03"], ["2020-01-01"]]
+
+
+def test_pages_follow_the_resolution():
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 4, 15).toordinal())
+    series = BalanceSeries.from_arrays(days, np.ones(days.size), np.ones(days.size), Currency.EUR)
+
+    pages = _pages(_query(Resolution.monthly), series, limit=3)
+
+    assert pages == [["2020-04-14", "2020-03-31", "2020-02-29"], ["2020-01-31"]]
+
+
+def test_unpaginated_balances_are_oldest_first():
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 4).toordinal())
+    series = BalanceSeries.from_arrays(days, np.ones(days.size), np.ones(days.size), Currency.EUR)
+
+    response = _query().respond_page(series, BalancePage(limit=None, cursor=None))
+
+    assert [item["date"] for item in orjson.loads(response.body)] == ["2020-01-01", "2020-01-02", "2020-01-03"]
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+
+def test_page_last_day():
+    page = BalancePage(limit=None, cursor=encode_cursor(date(2020, 6, 1)))
+
+    assert page.last_day(None) == date(2020, 6, 1)
+    assert page.last_day(date(2020, 1, 1)) == date(2020, 1, 1)
+    assert BalancePage(limit=10, cursor=None).last_day(None) is None
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(date(2021, 12, 31))) == date(2021, 12, 31)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor(date(2020, 1, 1))[:-2]])
+def test_invalid_cursor(cursor: str):
+    with pytest.raises(HTTPException) as error:
+        BalancePage(limit=None, cursor=cursor)
+
+    assert error.value.status_code == 422
@@ -0,0 +1,125 @@
+import gzip
+from datetime import date
+
+import numpy as np
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+
+from wealth.database.models import BalanceSeries
+from wealth.parameters.constants import Currency
+from wealth.parameters.general import Aggregation, BalanceFormat, Resolution
+from wealth.util import responses
+from wealth.util.query import BalanceQuery
+from wealth.util.responses import BalanceResponse, BalanceStreamingResponse, GzippedResponse, SelectedBalances
+from wealth.util.types import ColumnarBalances, WealthItem
+
+
+def test_balance_response_matches_response_model():
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 6).toordinal())
+    amounts = np.array([1.5, np.nan, 3.0, 4.25, 5.0])
+    series = BalanceSeries.from_arrays(days, amounts, amounts * 2, Currency.USD)
+
+    response = BalanceResponse([SelectedBalances(series.currency, *series.select())])
+
+    expected = jsonable_encoder(parse_obj_as(list[WealthItem], series.to_items()))
+    assert orjson.loads(response.body) == expected
+    assert response.media_type == "application/json"
+
+
+def test_balance_response_concatenates_assets():
+    first = SelectedBalances(Currency.EUR, np.array([date(2020, 1, 1).toordinal()]), np.array([1.0]), np.array([1.0]))
+    second = SelectedBalances(Currency.USD, np.array([date(2021, 1, 1).toordinal()]), np.array([2.0]), np.array([1.5]))
+
+    response = BalanceResponse([first, second])
+
+    assert orjson.loads(response.body) == [
+        {"date": "2020-01-01", "amount": 1.0, "amount_in_euro": 1.0, "currency": "EUR"},
+        {"date": "2021-01-01", "amount": 2.0, "amount_in_euro": 1.5, "currency": "USD"},
+    ]
+
+
+def test_balance_response_columnar():
+    days = np.array([date(2020, 1, 1).toordinal(), date(2020, 1, 3).toordinal()])
+    selected = SelectedBalances(Currency.USD, days, np.array([1.0, 2.5]), np.array([0.5, 2.0]))
+    empty = SelectedBalances(Currency.EUR, np.array([], dtype=np.int64), np.array([]), np.array([]))
+
+    response = BalanceResponse([selected, empty], BalanceFormat.columnar)
+
+    body = orjson.loads(response.body)
+    assert parse_obj_as(list[ColumnarBalances], body)
+    assert body == [
+        {"currency": "USD", "start": "2020-01-01", "dates": [0, 2], "amount": [1.0, 2.5], "amount_in_euro": [0.5, 2.0]},
+        {"currency": "EUR", "start": None, "dates": [], "amount": [], "amount_in_euro": []},
+    ]
+
+
+async def _read(response: BalanceStreamingResponse) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+async def _iterate(balances: list[SelectedBalances]):
+    for selected in balances:
+        yield selected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("balance_format", list(BalanceFormat))
+async def test_balance_streaming_response_matches_balance_response(balance_format, monkeypatch):
+    monkeypatch.setattr(responses, "STREAM_CHUNK_SIZE", 2)
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 6).toordinal())
+    first = SelectedBalances(Currency.USD, days, np.arange(5.0), np.arange(5.0) / 2)
+    empty = SelectedBalances(Currency.EUR, np.array([], dtype=np.int64), np.array([]), np.array([]))
+    second = SelectedBalances(Currency.EUR, days[:1], np.array([7.0]), np.array([7.0]))
+
+    for balances in ([first, empty, second], [empty], []):
+        streamed = await _read(BalanceStreamingResponse(_iterate(balances), balance_format))
+
+        assert orjson.loads(streamed) == orjson.loads(BalanceResponse(balances, balance_format).body)
+
+
+async def _call(response, accept_encoding: str) -> tuple[dict, bytes]:
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await response(scope, None, send)
+    return dict(messages[0]["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+
+@pytest.mark.asyncio
+async def test_stream_caches_the_gzipped_body_by_etag():
+    responses.response_cache.clear()
+    days = np.arange(date(2020, 1, 1).toordinal(), date(2020, 1, 6).toordinal())
+    series = BalanceSeries.from_arrays(days, np.arange(5.0), np.arange(5.0), Currency.USD)
+    query = BalanceQuery(
+        start=None,
+        end=None,
+        resolution=Resolution.daily,
+        aggregation=Aggregation.last,
+        balance_format=BalanceFormat.items,
+        etag='W/"etag"',
+    )
+    iterated = []
+
+    async def balances():
+        iterated.append(series)
+        yield series
+
+    streamed = await _read(query.stream(balances()))
+    cached = query.stream(balances())
+
+    assert isinstance(cached, GzippedResponse)
+    assert len(iterated) == 1
+    assert gzip.decompress(responses.response_cache.get('W/"etag"')) == streamed
+    headers, body = await _call(cached, "gzip, deflate")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'W/"etag"'
+    assert gzip.decompress(body) == streamed
+    headers, body = await _call(cached, "")
+    assert b"content-encoding" not in headers
+    assert body == streamed
+    responses.response_cache.clear()
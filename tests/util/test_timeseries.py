@@ -0,0 +1,48 @@
+from datetime import date
+
+import numpy as np
+
+from wealth.parameters.general import Aggregation, Resolution
+from wealth.util.timeseries import day_axis, downsample, period_starts
+
+
+def test_period_starts():
+    days = np.array([date(2020, 1, 5).toordinal(), date(2020, 1, 6).toordinal(), date(2020, 2, 29).toordinal()])
+
+    weeks = period_starts(days, Resolution.weekly)
+    months = period_starts(days, Resolution.monthly)
+    years = period_starts(days, Resolution.yearly)
+
+    assert [date.fromordinal(d) for d in weeks.tolist()] == [date(2019, 12, 30), date(2020, 1, 6), date(2020, 2, 24)]
+    assert [date.fromordinal(d) for d in months.tolist()] == [date(2020, 1, 1), date(2020, 1, 1), date(2020, 2, 1)]
+    assert [date.fromordinal(d) for d in years.tolist()] == [date(2020, 1, 1)] * 3
+
+
+def test_downsample_last():
+    days = day_axis(date(2020, 1, 30), date(2020, 3, 2))
+    values = np.arange(days.size, dtype=np.float64)
+
+    labels, (last,) = downsample(days, [values], Resolution.monthly, Aggregation.last)
+
+    assert [date.fromordinal(d) for d in labels.tolist()] == [date(2020, 1, 31), date(2020, 2, 29), date(2020, 3, 2)]
+    assert last.tolist() == [1, 30, 32]
+
+
+def test_downsample_mean():
+    days = day_axis(date(2020, 1, 30), date(2020, 2, 2))
+    values = np.array([1.0, 3.0, 10.0, 20.0])
+
+    labels, (mean,) = downsample(days, [values], Resolution.monthly, Aggregation.mean)
+
+    assert labels.tolist() == [date(2020, 1, 31).toordinal(), date(2020, 2, 2).toordinal()]
+    assert mean.tolist() == [2, 15]
+
+
+def test_downsample_daily_is_unchanged():
+    days = day_axis(date(2020, 1, 1), date(2020, 1, 3))
+    values = np.array([1.0, 2.0, 3.0])
+
+    labels, (same,) = downsample(days, [values], Resolution.daily, Aggregation.mean)
+
+    assert labels is days
+    assert same is values
@@ -1 +1,2 @@
-from .wealth_jwt import WealthJwt, get_authenticated_user
+from .etag import check_etag
+from .wealth_jwt import WealthJwt, get_authenticated_projection, get_authenticated_user, get_cached_user
@@ -0,0 +1,41 @@
+import hashlib
+from datetime import date
+
+from fastapi import Depends, Request, Response
+
+from wealth.database.cache import user_cache
+from wealth.database.models import UserVersion
+from wealth.util.exceptions import NotModifiedException
+
+from .wealth_jwt import get_authenticated_projection
+
+
+def make_etag(user_id: str, data_version: int, path: str, query: str, today: date) -> str:
+    """
+    A weak ETag, as the body is compressed on the way out, of everything a balance or asset response depends on.
+    The day is part of it because balances run up to today and the exchange rates change daily.
+    """
+    key = f"{user_id}|{data_version}|{path}|{query}|{today.isoformat()}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
+
+
+async def check_etag(
+    request: Request, response: Response, user: UserVersion = Depends(get_authenticated_projection(UserVersion))
+) -> str:
+    """
+    Answers 304 Not Modified when the If-None-Match header matches the current ETag of the route,
+    before the user or any balance is loaded. Otherwise drops the cached user if it is outdated,
+    sets the ETag header and returns it, routes that return a Response themselves have to set the header.
+    """
+    user_cache.invalidate_outdated(user.email, user.data_version)
+    etag = make_etag(str(user.id), user.data_version, request.url.path, request.url.query, date.today())
+    if etag_matches(etag, request.headers.get("If-None-Match", "")):
+        raise NotModifiedException(etag)
+    response.headers["ETag"] = etag
+    return etag
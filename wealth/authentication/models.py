@@ -6,7 +6,7 @@ from pydantic import BaseModel, ValidationError, root_validator, validator
 from wealth.database.models import User
 from wealth.parameters import env
 
-from .passwords import encode_password, validate_password
+from .passwords import validate_password
 
 
 class LoginUser(BaseModel):
@@ -43,10 +43,11 @@ class CreateUser(ViewUser):
 
     @validator("password", "password2")
     # pylint: disable=no-self-argument
-    def validate_password(cls, password: str) -> bytes:
+    def validate_password(cls, password: str) -> str:
+        # Hashed when the user is created, see hash_password
         if not validate_password(password):
             raise ValueError("Invalid password")
-        return encode_password(password)
+        return password
 
     @root_validator(pre=True)
     # pylint: disable=no-self-argument
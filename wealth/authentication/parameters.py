@@ -0,0 +1,4 @@
+from os import environ
+
+# The most passwords hashed or checked at once, each bcrypt call keeps a thread busy for up to a few hundred ms
+PASSWORD_HASH_WORKERS = int(environ.get("PASSWORD_HASH_WORKERS", 2))
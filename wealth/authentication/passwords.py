@@ -1,5 +1,64 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
 import bcrypt
 
+from .parameters import PASSWORD_HASH_WORKERS
+
+T = TypeVar("T")
+
+
+class PasswordPool:
+    """
+    Runs bcrypt on a dedicated pool of at most max_workers threads, so hashing never blocks the event loop,
+    and keeps how long the calls waited for a thread and how long they took.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self.calls = 0
+        self.queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.hash_time = 0.0
+        self.max_hash_time = 0.0
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        submitted = time.perf_counter()
+
+        def timed() -> tuple[T, float, float]:
+            started = time.perf_counter()
+            result = function(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        self.pending += 1
+        try:
+            result, queue_wait, hash_time = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self.pending -= 1
+        self.calls += 1
+        self.queue_wait += queue_wait
+        self.max_queue_wait = max(self.max_queue_wait, queue_wait)
+        self.hash_time += hash_time
+        self.max_hash_time = max(self.max_hash_time, hash_time)
+        return result
+
+    def stats(self) -> dict[str, float]:
+        """The number of calls and their queue wait and hash time in seconds"""
+        return {
+            "pending": self.pending,
+            "calls": self.calls,
+            "queue_wait": self.queue_wait,
+            "max_queue_wait": self.max_queue_wait,
+            "hash_time": self.hash_time,
+            "max_hash_time": self.max_hash_time,
+        }
+
+
+password_pool = PasswordPool(PASSWORD_HASH_WORKERS)
+
 
 def encode_password(password: str) -> bytes:
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt())
@@ -9,5 +68,15 @@ def check_password(input_password: str, db_password: bytes) -> bool:
     return bcrypt.checkpw(input_password.encode(), db_password)
 
 
+async def hash_password(password: str) -> bytes:
+    """encode_password on the password_pool, for use on the event loop"""
+    return await password_pool.run(encode_password, password)
+
+
+async def verify_password(input_password: str, db_password: bytes) -> bool:
+    """check_password on the password_pool, for use on the event loop"""
+    return await password_pool.run(check_password, input_password, db_password)
+
+
 def validate_password(password: str):
     return len(password) > 8
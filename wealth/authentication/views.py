@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends
 
-from wealth.authentication import get_authenticated_user
+from wealth.authentication import get_cached_user
 from wealth.database.models import User
 
 from .models import CreateUser, LoginUser, Settings, ViewUser
+from .passwords import hash_password
 from .wealth_jwt import WealthJwt
 
 router = APIRouter()
@@ -40,7 +41,7 @@ def refresh(authorize: WealthJwt = Depends()):
 
 
 @router.get("/user", response_model=ViewUser)
-async def get_user(current_user: User = Depends(get_authenticated_user)):
+async def get_user(current_user: User = Depends(get_cached_user)):
     return current_user
 
 
@@ -49,7 +50,7 @@ async def create_user(user: CreateUser, authorize: WealthJwt = Depends()):
     authorize.jwt_forbidden()
     await user.async_validate()
 
-    db_user = User.parse_obj(user.dict())
+    db_user = User.parse_obj({**user.dict(exclude={"password2"}), "password": await hash_password(user.password)})
     db_user = await db_user.save()
     return db_user
 
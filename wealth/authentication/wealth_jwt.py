@@ -1,24 +1,49 @@
+from functools import cache
+from typing import Awaitable, Callable, Type, TypeVar
+
 from fastapi import Depends, WebSocket
 from fastapi_jwt_auth import AuthJWT
 from fastapi_jwt_auth.exceptions import JWTDecodeError
+from pydantic import BaseModel
 
+from wealth.database.cache import user_cache
 from wealth.database.models import User
 
 from .models import LoginUser
-from .passwords import check_password
+from .passwords import verify_password
+
+ProjectionT = TypeVar("ProjectionT", bound=BaseModel)
 
 
 class WealthJwt(AuthJWT):
-    async def get_jwt_user(self) -> User | None:
+    async def get_jwt_user(self, cached: bool = False) -> User | None:
+        """
+        Loads the user of the JWT. A cached user is only up to date to within USER_CACHE_MAX_AGE,
+        and is not to be saved, see UserCache.get
+        """
         user_id = self.get_jwt_subject()
         if user_id is None:
             return None
-        user = await User.find_one(User.email == user_id)
+        if cached:
+            return await user_cache.get(user_id, _find_user)
+        return await _find_user(user_id)
+
+    async def get_authenticated_jwt_user(self, cached: bool = False) -> User:
+        self.jwt_required()
+        user = await self.get_jwt_user(cached)
+        if user is None:
+            raise JWTDecodeError(
+                status_code=401,
+                message=f"User in header {self._header_name} is not a valid user",
+            )
         return user
 
-    async def get_authenticated_jwt_user(self) -> User:
+    async def get_authenticated_jwt_projection(self, projection: Type[ProjectionT]) -> ProjectionT:
+        """
+        Like get_authenticated_jwt_user, but only loads the fields of the projection model
+        """
         self.jwt_required()
-        user = await self.get_jwt_user()
+        user = await User.find_one(User.email == self.get_jwt_subject()).project(projection)
         if user is None:
             raise JWTDecodeError(
                 status_code=401,
@@ -45,10 +70,35 @@ class WealthJwt(AuthJWT):
 
     async def login_user(self, user: LoginUser) -> User:
         db_user = await User.find_one(User.email == user.email)
-        if not db_user or not check_password(user.password, db_user.password):
+        if not db_user or not await verify_password(user.password, db_user.password):
             raise JWTDecodeError(status_code=401, message="User and password combination not correct")
         return db_user
 
 
+async def _find_user(email: str) -> User | None:
+    return await User.find_one(User.email == email)
+
+
 async def get_authenticated_user(authorize: WealthJwt = Depends()) -> User:
     return await authorize.get_authenticated_jwt_user()
+
+
+async def get_cached_user(authorize: WealthJwt = Depends()) -> User:
+    """
+    Like get_authenticated_user, but shares the cached users between requests.
+    Only for routes that never save the user, so an outdated user is never saved.
+    """
+    return await authorize.get_authenticated_jwt_user(cached=True)
+
+
+@cache
+def get_authenticated_projection(projection: Type[ProjectionT]) -> Callable[..., Awaitable[ProjectionT]]:
+    """
+    Returns a dependency on only the fields of the projection model of the authenticated user.
+    The same dependency is returned for the same model, so it can be overridden like get_authenticated_user.
+    """
+
+    async def get_projection(authorize: WealthJwt = Depends()) -> ProjectionT:
+        return await authorize.get_authenticated_jwt_projection(projection)
+
+    return get_projection
@@ -0,0 +1,29 @@
+import logging
+
+from wealth.database.balances import assets_with_balances, save_balances
+from wealth.database.models import User
+from wealth.database.users import unset_fields
+from wealth.logging import set_up_logging
+
+set_up_logging()
+LOGGER = logging.getLogger(__name__)
+
+
+async def move_account_balances_to_collection():
+    """
+    Moves the account balances that are still stored inside the user documents to the balance collection.
+    Accounts that already have stored balances keep them, as those were written after the embedded ones.
+    Runs on startup, before the balances are read from the collection. Does nothing once all users are moved.
+    """
+    users = await User.find({"accounts.balances": {"$exists": True}}).to_list()
+    if not users:
+        return
+    LOGGER.info(f"Moving the account balances of {len(users)} users to the balance collection")
+    for user in users:
+        assert user.id is not None
+        moved = await assets_with_balances(user.id)
+        for account in user.accounts:
+            if account.asset_id not in moved:
+                await save_balances(user, account.asset_id, account.balances)
+        await unset_fields(user, ["accounts.$[].balances"])
+    LOGGER.info("Done with moving the account balances")
@@ -1,20 +1,11 @@
-from datetime import date
 from uuid import UUID
 
 from pydantic import BaseModel
 
 from wealth.database.models import TinkCredentialStatus
-from wealth.parameters.constants import Currency
 from wealth.parameters.general import AccountSource
 
 
-class WealthItem(BaseModel):
-    date: date
-    amount: float
-    amount_in_euro: float = 0
-    currency: Currency
-
-
 class UpdateAccountRequest(BaseModel):
     is_active: bool | None
     name: str | None
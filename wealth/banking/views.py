@@ -1,31 +1,32 @@
 from fastapi import APIRouter, Depends
 
-from wealth.authentication import get_authenticated_user
-from wealth.database.models import User
+from wealth.authentication import check_etag, get_authenticated_projection, get_authenticated_user, get_cached_user
+from wealth.database.balances import iterate_account_balances, materialize_account_balances
+from wealth.database.models import User, UserAccounts
+from wealth.database.users import set_asset_fields
 from wealth.util.exceptions import NotFoundException
+from wealth.util.query import BalancePage, BalanceQuery
+from wealth.util.responses import BalanceResponse
+from wealth.util.types import Balances
 
-from .types import UpdateAccountRequest, UpdateAccountResponse, WealthItem
+from .types import UpdateAccountRequest, UpdateAccountResponse
 
 router = APIRouter()
 
 
-@router.get("/balances", response_model=list[WealthItem])
-async def get_balances(user: User = Depends(get_authenticated_user)):
-    balances = []
-    for account in user.accounts:
-        if not account.is_active:
-            continue
-        balances += account.balances
-    return balances
+@router.get("/balances", response_model=Balances, response_class=BalanceResponse, dependencies=[Depends(check_etag)])
+async def get_balances(user: User = Depends(get_cached_user), query: BalanceQuery = Depends()):
+    accounts = [a for a in user.accounts if a.is_active]
+    return query.stream(iterate_account_balances(user, accounts, query.start, query.end))
 
 
-@router.get("/accounts", response_model=list[UpdateAccountResponse])
-async def get_accounts(user: User = Depends(get_authenticated_user)):
+@router.get("/accounts", response_model=list[UpdateAccountResponse], dependencies=[Depends(check_etag)])
+async def get_accounts(user: UserAccounts = Depends(get_authenticated_projection(UserAccounts))):
     return user.accounts
 
 
-@router.get("/accounts/{account_id}", response_model=UpdateAccountResponse)
-async def get_account(account_id: str, user: User = Depends(get_authenticated_user)):
+@router.get("/accounts/{account_id}", response_model=UpdateAccountResponse, dependencies=[Depends(check_etag)])
+async def get_account(account_id: str, user: User = Depends(get_cached_user)):
     return user.find_account(account_id)
 
 
@@ -36,16 +37,27 @@ async def update_account(account_id: str, updated_account: UpdateAccountRequest,
         raise NotFoundException()
     if not updated_account.dict(exclude_none=True):
         return db_account
-    for key, value in updated_account:
-        if value is not None:
-            setattr(db_account, key, value)
-    await user.save()
+    fields = [key for key, value in updated_account if value is not None]
+    for key in fields:
+        setattr(db_account, key, getattr(updated_account, key))
+    await set_asset_fields(user, db_account, fields)
     return db_account
 
 
-@router.get("/accounts/{account_id}/balances", response_model=list[WealthItem])
-async def get_account_balances(account_id: str, user: User = Depends(get_authenticated_user)):
+@router.get(
+    "/accounts/{account_id}/balances",
+    response_model=Balances,
+    response_class=BalanceResponse,
+    dependencies=[Depends(check_etag)],
+)
+async def get_account_balances(
+    account_id: str,
+    user: User = Depends(get_cached_user),
+    query: BalanceQuery = Depends(),
+    page: BalancePage = Depends(),
+):
     account = user.find_account(account_id)
     if not account:
-        return []
-    return account.balances
+        return query.respond([])
+    await materialize_account_balances(user, [account], query.start, page.last_day(query.end))
+    return query.respond_page(account.balances, page)
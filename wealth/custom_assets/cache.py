@@ -0,0 +1,12 @@
+from datetime import date
+from uuid import UUID
+
+from wealth.database.models import BalanceSeries
+from wealth.util.cache import LruCache
+
+from .parameters import BALANCE_CACHE_MAX_AGE, BALANCE_CACHE_MAX_BYTES
+
+# Keyed by asset id, asset version and the day the balances were computed on
+balance_cache: LruCache[tuple[UUID, int, date], BalanceSeries] = LruCache(
+    BALANCE_CACHE_MAX_BYTES, lambda balances: balances.nbytes, max_age=BALANCE_CACHE_MAX_AGE
+)
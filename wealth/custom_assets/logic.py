@@ -1,48 +1,78 @@
 import logging
-from datetime import date, timedelta
+from datetime import date
 
-from wealth.database.models import CustomAsset, WealthItem
+import numpy as np
+
+from wealth.database.models import AssetEvent, BalanceSeries, CustomAsset
 from wealth.integrations.exchangeratesapi.dependency import Exchanger
-from wealth.util.validators import convert_datetime
+from wealth.util.timeseries import to_day_ordinal
+
+from .cache import balance_cache
 
 LOGGER = logging.getLogger(__name__)
 
 rates = Exchanger()
 
 
-async def populate_asset_balances(asset: CustomAsset) -> list[WealthItem]:
-    if not asset.events:
-        return []
-    event_list = sorted(asset.events, key=lambda a: a.date)
-    balances: list[WealthItem] = []
-
-    current_event = event_list.pop(0)
-    current_date = current_event.date.date()
-    while event_list:
-        next_event = event_list.pop(0)
-        next_date = next_event.date.date()
-        while current_date < next_date:
-            balances.append(
-                WealthItem(
-                    currency=asset.currency,
-                    date=convert_datetime(current_date),
-                    amount=current_event.amount,
-                    amount_in_euro=await rates.convert_to_euros_on_date(current_event.amount, asset.currency, current_date),
-                )
-            )
-            current_date += timedelta(days=1)
-        current_event = next_event
-        current_date = current_event.date.date()
-
-    while current_date <= date.today():
-        balances.append(
-            WealthItem(
-                currency=asset.currency,
-                date=convert_datetime(current_date),
-                amount=current_event.amount,
-                amount_in_euro=await rates.convert_to_euros_on_date(current_event.amount, asset.currency, current_date),
-            )
-        )
-        current_date += timedelta(days=1)
-
+async def materialize_balances(asset: CustomAsset) -> BalanceSeries:
+    """
+    Sets the balances of the asset, computed from its events.
+    They are cached per asset version for the rest of the day.
+    """
+    key = (asset.asset_id, asset.version, date.today())
+    balances = balance_cache.get(key)
+    if balances is None:
+        balances = await populate_asset_balances(asset)
+        balance_cache.set(key, balances)
+    asset.balances = balances
     return balances
+
+
+async def materialize_last_balance(asset: CustomAsset) -> BalanceSeries:
+    """
+    Sets the balances of the asset to only its last balance, which is all current_value needs,
+    without expanding the events into every day
+    """
+    days, amounts = calculate_last_asset_amount(asset.events, date.today())
+    asset.balances = await BalanceSeries.from_amounts(days, amounts, asset.currency, rates)
+    return asset.balances
+
+
+async def populate_asset_balances(asset: CustomAsset) -> BalanceSeries:
+    days, amounts = calculate_asset_amounts(asset.events, date.today())
+    return await BalanceSeries.from_amounts(days, amounts, asset.currency, rates)
+
+
+def calculate_asset_amounts(events: list[AssetEvent], end_date: date) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Expands the events into the amount of the asset on every day.
+    Each event starts a run that lasts until the next event, the last run lasts until the end date.
+    Returns the day ordinals and the amounts on those days.
+    """
+    if not events:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    event_days = np.fromiter((e.date.toordinal() for e in events), dtype=np.int64, count=len(events))
+    event_amounts = np.fromiter((e.amount for e in events), dtype=np.float64, count=len(events))
+    order = np.argsort(event_days, kind="stable")
+    event_days, event_amounts = event_days[order], event_amounts[order]
+
+    run_ends = np.append(event_days[1:], max(to_day_ordinal(end_date) + 1, int(event_days[-1])))
+    days = np.arange(event_days[0], run_ends[-1], dtype=np.int64)
+    return days, np.repeat(event_amounts, run_ends - event_days)
+
+
+def calculate_last_asset_amount(events: list[AssetEvent], end_date: date) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The last day and amount of calculate_asset_amounts, without expanding the events into every day.
+    That is the end date, or the day before an upcoming event, with the amount of the latest event on or before it.
+    """
+    if not events:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    event_days = [e.date.toordinal() for e in events]
+    last_day = max(to_day_ordinal(end_date), max(event_days) - 1)
+    # On the same day, the event that comes last in the list wins, like the stable sort of calculate_asset_amounts
+    candidates = [(day, i) for i, day in enumerate(event_days) if day <= last_day]
+    if not candidates:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    _, latest = max(candidates)
+    return np.array([last_day]), np.array([events[latest].amount])
@@ -0,0 +1,6 @@
+from datetime import timedelta
+from os import environ
+
+BALANCE_CACHE_MAX_BYTES = int(environ.get("CUSTOM_ASSET_BALANCE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+# The exchange rates are updated by the daily scripts in another process, so cached balances expire
+BALANCE_CACHE_MAX_AGE = timedelta(hours=1)
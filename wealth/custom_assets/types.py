@@ -6,13 +6,6 @@ from pydantic import BaseModel, validator
 from wealth.parameters.constants import Currency
 
 
-class WealthItem(BaseModel):
-    date: date
-    amount: float
-    amount_in_euro: float = 0
-    currency: Currency
-
-
 class CreateCustomAssetRequest(BaseModel):
     currency: Currency = Currency.EUR
     description: str
@@ -2,12 +2,16 @@ from datetime import date
 
 from fastapi import APIRouter, Depends
 
-from wealth.authentication import get_authenticated_user
-from wealth.custom_assets.logic import populate_asset_balances
+from wealth.authentication import check_etag, get_authenticated_projection, get_authenticated_user, get_cached_user
+from wealth.custom_assets.logic import materialize_balances, materialize_last_balance
 from wealth.database.models import AssetEvent as DBAssetEvent
 from wealth.database.models import CustomAsset as DBCustomAsset
-from wealth.database.models import User
+from wealth.database.models import User, UserCustomAssets
+from wealth.database.users import pull_asset, push_asset, set_asset_fields
 from wealth.util.exceptions import NotFoundException
+from wealth.util.query import BalancePage, BalanceQuery
+from wealth.util.responses import BalanceResponse
+from wealth.util.types import Balances
 
 from .types import (
     AssetEventRequest,
@@ -15,25 +19,22 @@ from .types import (
     CreateCustomAssetRequest,
     CustomAssetResponse,
     UpdateCustomAssetRequest,
-    WealthItem,
 )
 
 router = APIRouter()
 
 
-@router.get("/balances", response_model=list[WealthItem])
-async def get_balances(user: User = Depends(get_authenticated_user)):
-    balances = []
-    for asset in user.custom_assets:
-        balances += asset.balances
-    return balances
+@router.get("/balances", response_model=Balances, response_class=BalanceResponse, dependencies=[Depends(check_etag)])
+async def get_balances(user: User = Depends(get_cached_user), query: BalanceQuery = Depends()):
+    return query.stream(await materialize_balances(asset) for asset in user.custom_assets)
 
 
-@router.get("/assets", response_model=list[CustomAssetResponse])
-async def get_assets(user: User = Depends(get_authenticated_user)):
+@router.get("/assets", response_model=list[CustomAssetResponse], dependencies=[Depends(check_etag)])
+async def get_assets(user: UserCustomAssets = Depends(get_authenticated_projection(UserCustomAssets))):
     all_assets = user.custom_assets
     serialized_assets: list[dict] = []
     for db_asset in all_assets:
+        await materialize_last_balance(db_asset)
         serialized = db_asset.dict()
         serialized["current_value"] = db_asset.current_value
         serialized["current_value_in_euro"] = db_asset.current_value_in_euro
@@ -41,11 +42,12 @@ async def get_assets(user: User = Depends(get_authenticated_user)):
     return serialized_assets
 
 
-@router.get("/assets/{asset_id}", response_model=CustomAssetResponse)
-async def get_asset(asset_id: str, user: User = Depends(get_authenticated_user)):
+@router.get("/assets/{asset_id}", response_model=CustomAssetResponse, dependencies=[Depends(check_etag)])
+async def get_asset(asset_id: str, user: User = Depends(get_cached_user)):
     db_asset = user.find_custom_asset(asset_id)
     if db_asset is None:
         raise NotFoundException()
+    await materialize_balances(db_asset)
     serialized = db_asset.dict()
     serialized["current_value"] = db_asset.current_value
     serialized["current_value_in_euro"] = db_asset.current_value_in_euro
@@ -57,9 +59,9 @@ async def create_custom_asset(asset: CreateCustomAssetRequest, user: User = Depe
     asset_dict = asset.dict()
     event = DBAssetEvent(date=asset_dict.pop("asset_date"), amount=asset_dict.pop("amount"))
     db_asset = DBCustomAsset(**asset_dict, events=[event])
-    db_asset.balances = await populate_asset_balances(db_asset)
     user.custom_assets.append(db_asset)
-    await user.save()
+    await push_asset(user, db_asset)
+    await materialize_balances(db_asset)
 
     serialized = db_asset.dict()
     serialized["current_value"] = db_asset.current_value
@@ -76,10 +78,11 @@ async def update_custom_asset(
         raise NotFoundException()
     if not updated_asset.dict(exclude_none=True):
         return db_asset
-    for key, value in updated_asset:
-        if value is not None:
-            setattr(db_asset, key, value)
-    await user.save()
+    fields = [key for key, value in updated_asset if value is not None]
+    for key in fields:
+        setattr(db_asset, key, getattr(updated_asset, key))
+    await set_asset_fields(user, db_asset, fields, increment=["version"])
+    await materialize_balances(db_asset)
 
     serialized = db_asset.dict()
     serialized["current_value"] = db_asset.current_value
@@ -93,7 +96,7 @@ async def delete_custom_asset(asset_id: str, user: User = Depends(get_authentica
     if db_asset is None:
         raise NotFoundException()
     user.custom_assets = [asset for asset in user.custom_assets if asset != db_asset]
-    await user.save()
+    await pull_asset(user, db_asset)
 
 
 @router.put("/assets/{asset_id}/events", response_model=AssetEventResponse)
@@ -110,8 +113,7 @@ async def put_event(asset_id: str, event: AssetEventRequest, user: User = Depend
         for key, value in event:
             if value is not None:
                 setattr(matching_event, key, value)
-    db_asset.balances = await populate_asset_balances(db_asset)
-    await user.save()
+    await set_asset_fields(user, db_asset, ["events"], increment=["version"])
 
     return matching_event
 
@@ -126,12 +128,19 @@ async def delete_event(asset_id: str, event_date: date, user: User = Depends(get
     if not matching_event:
         raise NotFoundException()
     db_asset.events = [e for e in db_asset.events if e.date.date() != event_date]
-    await user.save()
+    await set_asset_fields(user, db_asset, ["events"], increment=["version"])
 
 
-@router.get("/assets/{asset_id}/balances", response_model=list[WealthItem])
-async def get_asset_balances(asset_id: str, user: User = Depends(get_authenticated_user)):
+@router.get(
+    "/assets/{asset_id}/balances", response_model=Balances, response_class=BalanceResponse, dependencies=[Depends(check_etag)]
+)
+async def get_asset_balances(
+    asset_id: str,
+    user: User = Depends(get_cached_user),
+    query: BalanceQuery = Depends(),
+    page: BalancePage = Depends(),
+):
     asset = user.find_custom_asset(asset_id)
     if not asset:
-        return []
-    return asset.balances
+        return query.respond([])
+    return query.respond_page(await materialize_balances(asset), page)
@@ -5,12 +5,17 @@ from wealth.parameters import GeneralParameters, env
 
 
 async def init_database(client: AsyncIOMotorClient | None = None):
+    """
+    Registers the document models, creating the indexes declared in their Collection settings that do not exist yet.
+    Fails when a unique index can not be created because the collection has duplicates.
+    """
     if client is None:
         client = AsyncIOMotorClient(env.MONGO_URL, uuidRepresentation="standard")
     await init_beanie(
         database=client[GeneralParameters.MONGO_DATABASE_NAME],
         document_models=[
             "wealth.database.models.User",
+            "wealth.database.models.BalanceBucket",
             "wealth.database.models.ExchangeRate",
             "wealth.database.models.StockTicker",
         ],
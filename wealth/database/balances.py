@@ -0,0 +1,111 @@
+from datetime import date
+from typing import AsyncIterator
+from uuid import UUID
+
+from beanie import PydanticObjectId
+from beanie.operators import In, NotIn, Set
+
+from .models import Account, BalanceBucket, BalanceSeries, User
+
+
+async def iterate_balances(
+    user_id: PydanticObjectId, asset_ids: list[UUID], start: date | None = None, end: date | None = None
+) -> AsyncIterator[tuple[UUID, BalanceSeries]]:
+    """
+    Loads the stored balances of the assets of the user with one query, yielding them asset by asset,
+    so only the buckets of one asset are in memory at a time. Assets without stored balances are skipped.
+    With start or end, only the buckets of the years in between are loaded.
+    """
+    query = BalanceBucket.find(BalanceBucket.user_id == user_id, In(BalanceBucket.asset_id, asset_ids))
+    if start is not None:
+        query = query.find(BalanceBucket.year >= start.year)
+    if end is not None:
+        query = query.find(BalanceBucket.year <= end.year)
+    buckets: list[BalanceBucket] = []
+    async for bucket in query.sort("asset_id", "year"):
+        if buckets and bucket.asset_id != buckets[0].asset_id:
+            yield buckets[0].asset_id, BalanceSeries.concat([b.balances for b in buckets])
+            buckets = []
+        buckets.append(bucket)
+    if buckets:
+        yield buckets[0].asset_id, BalanceSeries.concat([b.balances for b in buckets])
+
+
+async def load_balances(
+    user_id: PydanticObjectId, asset_ids: list[UUID], start: date | None = None, end: date | None = None
+) -> dict[UUID, BalanceSeries]:
+    """
+    Loads the stored balances of the assets of the user, with one query for all of them, see iterate_balances
+    """
+    return {asset_id: balances async for asset_id, balances in iterate_balances(user_id, asset_ids, start, end)}
+
+
+async def materialize_account_balances(
+    user: User, accounts: list[Account], start: date | None = None, end: date | None = None
+) -> list[Account]:
+    """
+    Sets the balances of the accounts of the user from the balance collection
+    """
+    assert user.id is not None
+    balances = await load_balances(user.id, [a.asset_id for a in accounts], start, end)
+    for account in accounts:
+        account.balances = balances.get(account.asset_id, BalanceSeries.empty(account.currency))
+    return accounts
+
+
+async def iterate_account_balances(
+    user: User, accounts: list[Account], start: date | None = None, end: date | None = None
+) -> AsyncIterator[BalanceSeries]:
+    """
+    Yields the stored balances of each of the accounts of the user in their order, loaded with one query for all of them.
+    Accounts without stored balances yield an empty series.
+    """
+    assert user.id is not None
+    balances = await load_balances(user.id, [a.asset_id for a in accounts], start, end)
+    for account in accounts:
+        yield balances.get(account.asset_id, BalanceSeries.empty(account.currency))
+
+
+async def assets_with_balances(user_id: PydanticObjectId) -> set[UUID]:
+    """
+    The assets of the user that have stored balances, without loading them
+    """
+    return set(await BalanceBucket.distinct("asset_id", {"user_id": user_id}))
+
+
+async def save_changed_balances(user: User, balances: dict[UUID, BalanceSeries]) -> list[UUID]:
+    """
+    Saves the balances of the assets of the user that differ from the stored ones, see save_balances.
+    Returns the assets whose balances were saved.
+    """
+    assert user.id is not None
+    stored = await load_balances(user.id, list(balances))
+    changed = [
+        asset_id
+        for asset_id, series in balances.items()
+        if stored.get(asset_id, BalanceSeries.empty(series.currency)) != series
+    ]
+    for asset_id in changed:
+        await save_balances(user, asset_id, balances[asset_id])
+    return changed
+
+
+async def save_balances(user: User, asset_id: UUID, balances: BalanceSeries):
+    """
+    Replaces the stored balances of the asset of the user, one bucket per year.
+    This does not bump the data version of the user, save the user after its balances.
+    """
+    assert user.id is not None
+    user_id = user.id
+    years = balances.split_by_year()
+    for year, series in years.items():
+        query = BalanceBucket.find_one(
+            BalanceBucket.user_id == user_id, BalanceBucket.asset_id == asset_id, BalanceBucket.year == year
+        )
+        await query.upsert(
+            Set({BalanceBucket.balances: series}),
+            on_insert=BalanceBucket(user_id=user_id, asset_id=asset_id, year=year, balances=series),
+        )
+    await BalanceBucket.find(
+        BalanceBucket.user_id == user_id, BalanceBucket.asset_id == asset_id, NotIn(BalanceBucket.year, list(years))
+    ).delete()
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import timedelta
+from typing import TYPE_CHECKING, Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel
+
+from wealth.util.cache import LruCache
+
+from .parameters import USER_CACHE_MAX_AGE, USER_CACHE_MAX_USERS
+
+if TYPE_CHECKING:
+    from .models import User
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class UserCache:
+    """
+    Users by email, for the requests that only read them.
+    Users expire after max_age, as other processes save users too, and are dropped whenever the user is saved
+    in this process or a newer data version of it is seen. Concurrent misses for the same email share one query,
+    and a query that started before an invalidation does not fill the cache.
+    """
+
+    def __init__(self, max_users: int, max_age: timedelta):
+        self._users: LruCache[str, "User"] = LruCache(max_users, lambda _: 1, max_age)
+        self._loading: dict[str, asyncio.Future["User | None"]] = {}
+        self._generation = 0
+
+    async def get(self, email: str, load: Callable[[str], Awaitable["User | None"]]) -> "User | None":
+        """
+        Returns a copy of the cached user, or loads it with load when it is not cached.
+        The copy shares everything below the assets with the cached user, so it must only be read,
+        apart from setting the balances of its assets.
+        """
+        user = self._users.get(email)
+        if user is None:
+            loading = self._loading.get(email)
+            if loading is None:
+                loading = asyncio.ensure_future(self._load(email, load, self._generation))
+                self._loading[email] = loading
+            # Shielded, as the other requests waiting for the same user should not be cancelled with this one
+            user = await asyncio.shield(loading)
+        return None if user is None else _copy_for_reading(user)
+
+    async def _load(self, email: str, load: Callable[[str], Awaitable["User | None"]], generation: int) -> "User | None":
+        try:
+            user = await load(email)
+        finally:
+            if self._loading.get(email) is asyncio.current_task():
+                del self._loading[email]
+        if user is not None and generation == self._generation:
+            self._users.set(email, user)
+        return user
+
+    def invalidate(self, email: str):
+        self._generation += 1
+        self._users.invalidate(email)
+        self._loading.pop(email, None)
+
+    def invalidate_outdated(self, email: str, data_version: int):
+        """Drops the cached user if it is older than the data version"""
+        user = self._users.get(email) if email in self._users else None
+        if user is not None and user.data_version != data_version:
+            self.invalidate(email)
+
+    def clear(self):
+        self._generation += 1
+        self._users.clear()
+        self._loading.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._users.stats()
+
+
+def _copy_for_reading(user: "User") -> "User":
+    return user.copy(
+        update={
+            "accounts": [_shallow_copy(a) for a in user.accounts],
+            "stock_positions": [_shallow_copy(p) for p in user.stock_positions],
+            "custom_assets": [_shallow_copy(a) for a in user.custom_assets],
+        }
+    )
+
+
+def _shallow_copy(model: ModelT) -> ModelT:
+    # Unlike BaseModel.copy, keeps the excluded fields, like the balances of the assets
+    return model.construct(model.__fields_set__, **model.__dict__)
+
+
+user_cache = UserCache(USER_CACHE_MAX_USERS, USER_CACHE_MAX_AGE)
@@ -0,0 +1,67 @@
+"""
+Prints the query plans of the hot queries, to check that they use an index instead of scanning the collection.
+
+Run against a local database with `MONGO_URL=mongodb://localhost:27017 python -m wealth.database.explain`
+"""
+import asyncio
+from typing import Any, Mapping, NamedTuple, Type
+from uuid import UUID
+
+from beanie import Document, PydanticObjectId
+from beanie.operators import In
+
+from wealth.parameters.constants import Currency
+
+from .api import init_database
+from .models import BalanceBucket, ExchangeRate, StockTicker, User
+
+
+class HotQuery(NamedTuple):
+    model: Type[Document]
+    query: Mapping[str, Any]
+    sort: list[tuple[str, int]] | None = None
+
+
+def hot_queries() -> dict[str, HotQuery]:
+    """The queries that run on every request or for every user"""
+    return {
+        "user by email": HotQuery(User, User.find(User.email == "explain@example.com").get_filter_query()),
+        "user by tink user id": HotQuery(User, User.find(User.tink_user_id == "explain").get_filter_query()),
+        "stock ticker by symbol": HotQuery(StockTicker, StockTicker.find(StockTicker.symbol == "AAPL").get_filter_query()),
+        "exchange rate by currency": HotQuery(
+            ExchangeRate, ExchangeRate.find(ExchangeRate.currency == Currency.USD).get_filter_query()
+        ),
+        "balance buckets of assets": HotQuery(
+            BalanceBucket,
+            BalanceBucket.find(
+                BalanceBucket.user_id == PydanticObjectId(), In(BalanceBucket.asset_id, [UUID(int=0)])
+            ).get_filter_query(),
+            [("asset_id", 1), ("year", 1)],
+        ),
+    }
+
+
+def plan_stages(plan: dict[str, Any]) -> list[str]:
+    """The stages of a query plan from the outermost one in, with the index of the index scans"""
+    stage = plan["stage"]
+    if "indexName" in plan:
+        stage += f"({plan['indexName']})"
+    inputs = [plan["inputStage"]] if "inputStage" in plan else plan.get("inputStages", [])
+    return [stage] + [s for i in inputs for s in plan_stages(i)]
+
+
+async def explain_hot_queries():
+    await init_database()
+    for name, hot_query in hot_queries().items():
+        cursor = hot_query.model.get_motor_collection().find(hot_query.query)
+        if hot_query.sort:
+            cursor = cursor.sort(hot_query.sort)
+        explained = await cursor.explain()
+        stages = plan_stages(explained["queryPlanner"]["winningPlan"])
+        examined = explained.get("executionStats", {}).get("totalDocsExamined", "?")
+        print(f"{name}: {' <- '.join(stages)}, {examined} documents examined")
+
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(explain_hot_queries())
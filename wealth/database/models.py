@@ -1,15 +1,25 @@
 from datetime import date, datetime
 from enum import Enum
-from typing import List, Protocol, Union
+from typing import TYPE_CHECKING, List, Protocol, Union
 from uuid import UUID, uuid4
 
-from beanie import Document
+import numpy as np
+from beanie import Document, Insert, PydanticObjectId, Replace, after_event, before_event
+from beanie.odm.utils.encoder import Encoder
+from bson import Binary
 from pydantic import BaseModel, Field, validator
+from pymongo import ASCENDING, IndexModel, ReturnDocument
 
 from wealth.parameters.constants import Currency
-from wealth.parameters.general import AccountSource
+from wealth.parameters.general import AccountSource, Aggregation, Resolution
+from wealth.util.timeseries import downsample
 from wealth.util.validators import convert_datetime
 
+from .cache import user_cache
+
+if TYPE_CHECKING:
+    from wealth.integrations.exchangeratesapi.dependency import Exchanger
+
 
 # pylint: disable=abstract-method
 class WealthItem(BaseModel):
@@ -25,11 +35,198 @@ class WealthItem(BaseModel):
         return convert_datetime(v)
 
 
+class BalanceSeries:
+    """
+    The balances of an asset on consecutive days, stored column by column instead of as one WealthItem per day.
+    amount[i] and amount_in_euro[i] are the balances on the day ordinal start + i, NaN on days without a balance.
+    Series are shared between caches and requests, so they are never modified in place.
+    """
+
+    __slots__ = ("start", "currency", "amount", "amount_in_euro")
+
+    def __init__(self, start: int, currency: Currency, amount: np.ndarray, amount_in_euro: np.ndarray):
+        self.start = start
+        self.currency = currency
+        self.amount = amount
+        self.amount_in_euro = amount_in_euro
+
+    @classmethod
+    def empty(cls, currency: Currency = Currency.EUR) -> "BalanceSeries":
+        return cls(0, currency, np.empty(0), np.empty(0))
+
+    @classmethod
+    def from_arrays(
+        cls, days: np.ndarray, amounts: np.ndarray, amounts_in_euro: np.ndarray, currency: Currency
+    ) -> "BalanceSeries":
+        """
+        Builds the series from balances on the given day ordinals, which do not need to be consecutive.
+        When the same day is given more than once, the last balance wins.
+        """
+        if not days.size:
+            return cls.empty(currency)
+        start = int(days.min())
+        if np.all(np.diff(days) == 1):
+            return cls(start, currency, np.asarray(amounts, dtype=np.float64), np.asarray(amounts_in_euro, dtype=np.float64))
+        amount = np.full(int(days.max()) - start + 1, np.nan)
+        amount_in_euro = np.full_like(amount, np.nan)
+        amount[days - start] = amounts
+        amount_in_euro[days - start] = amounts_in_euro
+        return cls(start, currency, amount, amount_in_euro)
+
+    @classmethod
+    async def from_amounts(
+        cls, days: np.ndarray, amounts: np.ndarray, currency: Currency, rates: "Exchanger"
+    ) -> "BalanceSeries":
+        """
+        Builds the series from amounts in the currency on the given day ordinals, see from_arrays,
+        converting them to euros with the rates, which are only loaded when there is something to convert
+        """
+        if not days.size:
+            return cls.empty(currency)
+        await rates.update_exchange_rates(currency)
+        return cls.from_arrays(days, amounts, rates.convert_series_to_euros(amounts, currency, days), currency)
+
+    @classmethod
+    def from_items(cls, items: List[WealthItem], currency: Currency = Currency.EUR) -> "BalanceSeries":
+        if items:
+            currency = items[0].currency
+        return cls.from_arrays(
+            np.fromiter((i.date.toordinal() for i in items), dtype=np.int64, count=len(items)),
+            np.fromiter((i.amount for i in items), dtype=np.float64, count=len(items)),
+            np.fromiter((i.amount_in_euro for i in items), dtype=np.float64, count=len(items)),
+            currency,
+        )
+
+    @classmethod
+    def concat(cls, parts: List["BalanceSeries"], currency: Currency = Currency.EUR) -> "BalanceSeries":
+        """
+        Joins series of the same asset, e.g. the yearly buckets of its balances.
+        Days covered by none of the parts are NaN.
+        """
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty(currency)
+        start = min(p.start for p in parts)
+        amount = np.full(max(p.end for p in parts) - start + 1, np.nan)
+        amount_in_euro = np.full_like(amount, np.nan)
+        for part in parts:
+            amount[part.start - start : part.end - start + 1] = part.amount
+            amount_in_euro[part.start - start : part.end - start + 1] = part.amount_in_euro
+        return cls(start, parts[0].currency, amount, amount_in_euro)
+
+    def split_by_year(self) -> dict[int, "BalanceSeries"]:
+        """Splits the series into one series per calendar year"""
+        parts: dict[int, BalanceSeries] = {}
+        if not self:
+            return parts
+        for year in range(date.fromordinal(self.start).year, date.fromordinal(self.end).year + 1):
+            first = max(date(year, 1, 1).toordinal(), self.start) - self.start
+            last = min(date(year, 12, 31).toordinal(), self.end) - self.start
+            parts[year] = BalanceSeries(
+                self.start + first, self.currency, self.amount[first : last + 1], self.amount_in_euro[first : last + 1]
+            )
+        return parts
+
+    @property
+    def end(self) -> int:
+        """The day ordinal of the last day in the series"""
+        return self.start + len(self) - 1
+
+    @property
+    def days(self) -> np.ndarray:
+        """The day ordinals of the days with a balance"""
+        return self.start + np.flatnonzero(~np.isnan(self.amount))
+
+    @property
+    def nbytes(self) -> int:
+        return self.amount.nbytes + self.amount_in_euro.nbytes
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def __eq__(self, other):
+        if not isinstance(other, BalanceSeries):
+            return NotImplemented
+        return (
+            self.start == other.start
+            and self.currency == other.currency
+            and np.array_equal(self.amount, other.amount, equal_nan=True)
+            and np.array_equal(self.amount_in_euro, other.amount_in_euro, equal_nan=True)
+        )
+
+    def __repr__(self) -> str:
+        return f"BalanceSeries(start={self.start}, currency={self.currency.value}, days={len(self)})"
+
+    def select(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        resolution: Resolution = Resolution.daily,
+        aggregation: Aggregation = Aggregation.last,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the day ordinals with a balance, and the balances on those days.
+        Optionally only from start up to and including end,
+        and downsampled to one balance per week, month or year.
+        """
+        first = 0 if start is None else max(start.toordinal() - self.start, 0)
+        last = len(self) if end is None else max(end.toordinal() - self.start + 1, 0)
+        known = first + np.flatnonzero(~np.isnan(self.amount[first:last]))
+        days, (amounts, amounts_in_euro) = downsample(
+            self.start + known, [self.amount[known], self.amount_in_euro[known]], resolution, aggregation
+        )
+        return days, amounts, amounts_in_euro
+
+    def to_items(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        resolution: Resolution = Resolution.daily,
+        aggregation: Aggregation = Aggregation.last,
+    ) -> List[WealthItem]:
+        """The backwards compatible view, one WealthItem per selected balance, see select"""
+        days, amounts, amounts_in_euro = self.select(start, end, resolution, aggregation)
+        return [
+            WealthItem.construct(
+                date=datetime.fromordinal(day), amount=amount, amount_in_euro=amount_in_euro, currency=self.currency
+            )
+            for day, amount, amount_in_euro in zip(days.tolist(), amounts.tolist(), amounts_in_euro.tolist())
+        ]
+
+    def to_bson(self) -> dict:
+        return {
+            "start": self.start,
+            "currency": self.currency.value,
+            "amount": Binary(self.amount.astype("<f8").tobytes()),
+            "amount_in_euro": Binary(self.amount_in_euro.astype("<f8").tobytes()),
+        }
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value) -> "BalanceSeries":
+        """Accepts a series, its stored form, or a list of WealthItems as it used to be stored"""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, list):
+            return cls.from_items([WealthItem.parse_obj(v) for v in value])
+        if isinstance(value, dict):
+            return cls(
+                int(value["start"]),
+                Currency(value["currency"]),
+                np.frombuffer(value["amount"], dtype="<f8"),
+                np.frombuffer(value["amount_in_euro"], dtype="<f8"),
+            )
+        raise TypeError(f"Can not convert {type(value).__name__} to a BalanceSeries")
+
+
 class AssetClass(Protocol):
     asset_id: UUID
     currency: Currency
 
-    balances: list[WealthItem]
+    balances: BalanceSeries
 
     @property
     def current_value(self) -> float:
@@ -41,19 +238,19 @@ class AssetClass(Protocol):
 
 
 class AssetClassMethods:
-    balances: list[WealthItem]
+    balances: BalanceSeries
 
     @property
     def current_value(self) -> float:
         if not self.balances:
             return 0
-        return self.balances[-1].amount
+        return float(self.balances.amount[-1])
 
     @property
     def current_value_in_euro(self) -> float:
         if not self.balances:
             return 0
-        return self.balances[-1].amount_in_euro
+        return float(self.balances.amount_in_euro[-1])
 
 
 class TinkCredentialStatus(str, Enum):
@@ -79,7 +276,8 @@ class Account(AssetClassMethods, BaseModel):
     bank: str = ""
     bank_alias: str = ""
 
-    balances: List[WealthItem] = []
+    # Not stored in the user, see BalanceBucket and wealth.database.balances
+    balances: BalanceSeries = Field(default_factory=BalanceSeries.empty, exclude=True)
 
     # Tink stuff
     credential_id: str = ""
@@ -101,7 +299,8 @@ class StockPosition(AssetClassMethods, BaseModel):
     start_date: datetime
     ticker: str
 
-    balances: List[WealthItem] = []
+    # Not stored, computed from the ticker prices on read, see wealth.stocks.logic.materialize_balances
+    balances: BalanceSeries = Field(default_factory=BalanceSeries.empty, exclude=True)
 
     @validator("start_date", pre=True)
     # pylint: disable=no-self-argument
@@ -125,7 +324,10 @@ class CustomAsset(AssetClassMethods, BaseModel):
     description: str = ""
 
     events: List[AssetEvent] = []
-    balances: List[WealthItem] = []
+    # Bumped on every change to the events or the currency, the balances are cached per version
+    version: int = 0
+    # Not stored, computed from the events on read, see wealth.custom_assets.logic.materialize_balances
+    balances: BalanceSeries = Field(default_factory=BalanceSeries.empty, exclude=True)
 
     def find_event(self, event_date: date) -> AssetEvent | None:
         matching_events = [e for e in self.events if e.date.date() == event_date]
@@ -156,8 +358,48 @@ class User(Document):
     # Tink stuff
     tink_user_id: str = ""
 
+    # Bumped on every save, and whenever anything the balances of the user are computed from changes.
+    # Identifies the version of the data in the ETags of the balance and asset routes.
+    # Only ever incremented in the database, so two different states of a user never share a version.
+    data_version: int = 0
+
     class Collection:
         name = "user"
+        bson_encoders = {BalanceSeries: BalanceSeries.to_bson}
+        indexes = [
+            # Every authenticated request looks the user up by email
+            IndexModel([("email", ASCENDING)], unique=True),
+            IndexModel([("tink_user_id", ASCENDING)]),
+        ]
+
+    @before_event([Insert])
+    def bump_data_version(self):
+        self.data_version += 1
+
+    async def save(self, *args, **kwargs) -> "User":
+        """
+        Inserts a new user, or writes everything but the data version of a stored user and increments the version
+        in the same update. Replacing the user would write the version it was loaded with plus one,
+        which a concurrent update may already have used for other data.
+        """
+        if self.id is None:
+            return await super().save(*args, **kwargs)
+        encoder = Encoder(exclude={"_id", "data_version", "revision_id"}, custom_encoders=self.Collection.bson_encoders)
+        stored = await self.get_motor_collection().find_one_and_update(
+            {"_id": self.id},
+            {"$set": encoder.encode_base_model(self), "$inc": {"data_version": 1}},
+            projection={"data_version": True},
+            return_document=ReturnDocument.AFTER,
+        )
+        if stored is None:
+            return await super().save(*args, **kwargs)
+        self.data_version = stored["data_version"]
+        user_cache.invalidate(self.email)
+        return self
+
+    @after_event([Insert, Replace])
+    def invalidate_cached_user(self):
+        user_cache.invalidate(self.email)
 
     @property
     def assets(self) -> List[AssetClass]:
@@ -171,7 +413,7 @@ class User(Document):
     def balances(self) -> List[WealthItem]:
         balances = []
         for asset in self.assets:
-            balances += asset.balances
+            balances += asset.balances.to_items()
         return balances
 
     def find_account(self, account_id: Union[UUID, str]) -> Account | None:
@@ -199,6 +441,50 @@ class User(Document):
         return asset[0]
 
 
+class UserAccounts(BaseModel):
+    """Only the accounts of a user, for routes that do not need the rest of it"""
+
+    accounts: List[Account] = []
+
+
+class UserStockPositions(BaseModel):
+    """Only the stock positions of a user, for routes that do not need the rest of it"""
+
+    stock_positions: List[StockPosition] = []
+
+
+class UserCustomAssets(BaseModel):
+    """Only the custom assets of a user, for routes that do not need the rest of it"""
+
+    custom_assets: List[CustomAsset] = []
+
+
+class UserVersion(BaseModel):
+    """Only the email and data version of a user, to check ETags without loading the rest of it"""
+
+    id: PydanticObjectId | None = Field(None, alias="_id")
+    email: str = ""
+    data_version: int = 0
+
+
+class BalanceBucket(Document):
+    """
+    The stored balances of one asset of a user in one calendar year
+    """
+
+    user_id: PydanticObjectId
+    asset_id: UUID
+    year: int
+    balances: BalanceSeries
+
+    class Collection:
+        name = "balance"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("asset_id", ASCENDING), ("year", ASCENDING)], unique=True),
+        ]
+        bson_encoders = {BalanceSeries: BalanceSeries.to_bson}
+
+
 class ExchangeRateItem(BaseModel):
     date: datetime
     rate: float
@@ -218,6 +504,12 @@ class ExchangeRate(Document):
     def get_rates_in_dict(self) -> dict[date, float]:
         return {r.date.date(): r.rate for r in self.rates}
 
+    def get_rates_in_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the day ordinals and the rates on those days"""
+        days = np.fromiter((r.date.toordinal() for r in self.rates), dtype=np.int64, count=len(self.rates))
+        rates = np.fromiter((r.rate for r in self.rates), dtype=np.float64, count=len(self.rates))
+        return days, rates
+
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return NotImplemented
@@ -226,6 +518,7 @@ class ExchangeRate(Document):
 
     class Collection:
         name = "exchange_rate"
+        indexes = [IndexModel([("currency", ASCENDING)], unique=True)]
 
 
 class StockTickerItem(BaseModel):
@@ -244,9 +537,26 @@ class StockTicker(Document):
     symbol: str
     currency: Currency
     rates: List[StockTickerItem] = []
+    # Bumped every time earlier prices are revised, e.g. the adjusted close after a dividend
+    history_version: int = 0
 
     def get_rates_in_dict(self) -> dict[date, float]:
         return {r.date.date(): r.price for r in self.rates}
 
+    def update_rates(self, rates: List[StockTickerItem]):
+        """Replaces the rates, bumping the history version when any earlier price changed or disappeared"""
+        previous_rates = self.get_rates_in_dict()
+        self.rates = rates
+        current_rates = self.get_rates_in_dict()
+        if any(current_rates.get(day) != price for day, price in previous_rates.items()):
+            self.history_version += 1
+
+    def get_rates_in_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the day ordinals and the prices on those days"""
+        days = np.fromiter((r.date.toordinal() for r in self.rates), dtype=np.int64, count=len(self.rates))
+        prices = np.fromiter((r.price for r in self.rates), dtype=np.float64, count=len(self.rates))
+        return days, prices
+
     class Collection:
         name = "stock_ticker"
+        indexes = [IndexModel([("symbol", ASCENDING)], unique=True)]
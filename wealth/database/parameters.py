@@ -0,0 +1,6 @@
+from datetime import timedelta
+from os import environ
+
+USER_CACHE_MAX_USERS = int(environ.get("USER_CACHE_MAX_USERS", 10_000))
+# Other processes, like the daily scripts, save users too, so cached users expire quickly
+USER_CACHE_MAX_AGE = timedelta(seconds=int(environ.get("USER_CACHE_MAX_AGE_SECONDS", 30)))
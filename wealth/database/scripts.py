@@ -0,0 +1,35 @@
+import logging
+
+from beanie.operators import Inc
+
+from wealth.database.cache import user_cache
+from wealth.database.models import User
+from wealth.logging import set_up_logging
+
+set_up_logging()
+LOGGER = logging.getLogger(__name__)
+
+# The arrays of the user whose assets no longer store their balances
+_EMBEDDED_BALANCE_ARRAYS = ["stock_positions", "custom_assets"]
+
+
+async def bump_all_data_versions():
+    """
+    Bumps the data version of every user, as the daily scripts update the exchange rates and ticker prices
+    the balances of all users are computed from
+    """
+    await User.find_all().update(Inc({User.data_version: 1}))
+    user_cache.clear()
+    LOGGER.info("Bumped the data version of all users")
+
+
+async def remove_embedded_asset_balances():
+    """
+    Removes the balances that used to be stored inside the stock positions and custom assets of the user documents.
+    They are computed on read now, and as users are updated in place instead of replaced, they would otherwise stay
+    and still be parsed on every load. Does nothing once all users are cleaned up.
+    """
+    for array in _EMBEDDED_BALANCE_ARRAYS:
+        # $[] needs the array to exist, which the filter makes sure of
+        await User.find({f"{array}.balances": {"$exists": True}}).update({"$unset": {f"{array}.$[].balances": ""}})
+    LOGGER.info("Removed the embedded asset balances")
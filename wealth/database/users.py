@@ -0,0 +1,113 @@
+import hashlib
+from typing import Any, Iterable, Mapping
+
+import bson
+from beanie.odm.utils.encoder import Encoder
+from beanie.operators import Inc, Pull, Push, Set, Unset
+from pymongo import ReturnDocument
+
+from .cache import user_cache
+from .models import Account, CustomAsset, StockPosition, User
+
+UserAsset = Account | StockPosition | CustomAsset
+
+# The array of the user each kind of asset is stored in, and the field that identifies it there
+_ASSET_ARRAYS: dict[type, tuple[str, str]] = {
+    Account: ("accounts", "account_id"),
+    StockPosition: ("stock_positions", "position_id"),
+    CustomAsset: ("custom_assets", "asset_id"),
+}
+
+
+async def push_asset(user: User, asset: UserAsset):
+    """
+    Appends the asset to its array in the stored user, without replacing the rest of the user
+    """
+    array, _ = _ASSET_ARRAYS[type(asset)]
+    await _update_user(user, {}, Push({array: asset}))
+
+
+async def set_asset_fields(user: User, asset: UserAsset, fields: Iterable[str], increment: Iterable[str] = ()):
+    """
+    Sets the fields of the asset in the stored user to their current values, without replacing the rest of the user.
+    The fields in increment, like the version of a custom asset, are incremented in the same update
+    and set to their stored values, so concurrent updates never end up with the same value.
+    Does nothing when the stored user no longer has the asset.
+    """
+    array, id_field = _ASSET_ARRAYS[type(asset)]
+    asset_id = getattr(asset, id_field)
+    updates: list[Set | Inc] = [Set({f"{array}.$.{field}": getattr(asset, field) for field in fields})]
+    increment = list(increment)
+    if increment:
+        updates.append(Inc({f"{array}.$.{field}": 1 for field in increment}))
+    stored = await _update_user(user, {f"{array}.{id_field}": asset_id}, *updates, projection=[array])
+    if stored is not None:
+        stored_asset = next(a for a in stored[array] if a[id_field] == asset_id)
+        for field in increment:
+            setattr(asset, field, stored_asset[field])
+
+
+async def pull_asset(user: User, asset: UserAsset):
+    """
+    Removes the asset from its array in the stored user, without replacing the rest of the user
+    """
+    array, id_field = _ASSET_ARRAYS[type(asset)]
+    await _update_user(user, {}, Pull({array: {id_field: getattr(asset, id_field)}}))
+
+
+async def unset_fields(user: User, fields: Iterable[str]):
+    """
+    Removes the fields from the stored user, without replacing the rest of the user
+    """
+    await _update_user(user, {}, Unset({field: "" for field in fields}))
+
+
+def content_hash(user: User) -> bytes:
+    """
+    A hash of what saving the user would store, apart from its data version and revision,
+    to tell whether the user changed since it was loaded or saved
+    """
+    encoder = Encoder(exclude={"data_version", "revision_id"}, custom_encoders=User.Collection.bson_encoders)
+    return hashlib.sha1(bson.encode(encoder.encode_base_model(user))).digest()
+
+
+async def save_if_changed(user: User, previous_hash: bytes) -> bool:
+    """
+    Saves the user only if its content hash differs from the previous one, returns whether it was saved
+    """
+    if content_hash(user) == previous_hash:
+        return False
+    await user.save()
+    return True
+
+
+async def bump_data_version(user: User):
+    """
+    Bumps the data version of the stored user without saving it, for when only data stored outside of it changed
+    """
+    await _update_user(user, {})
+
+
+async def _update_user(
+    user: User, query: Mapping[str, Any], *updates: Set | Push | Pull | Unset | Inc, projection: Iterable[str] = ()
+) -> Mapping[str, Any] | None:
+    """
+    Updates the stored user, bumping its data version with $inc, as the before and after events of save do not run.
+    Returns the projected fields of the updated user, None when the query matched no user.
+    """
+    assert user.id is not None
+    update: dict[str, Any] = {}
+    for operator in (*updates, Inc({User.data_version: 1})):
+        for name, values in operator.query.items():
+            update.setdefault(name, {}).update(values)
+    encoder = Encoder(custom_encoders=User.Collection.bson_encoders)
+    stored = await User.get_motor_collection().find_one_and_update(
+        {"_id": user.id, **query},
+        encoder.encode(update),
+        projection=[*projection, "data_version"],
+        return_document=ReturnDocument.AFTER,
+    )
+    if stored is not None:
+        user.data_version = stored["data_version"]
+    user_cache.invalidate(user.email)
+    return stored
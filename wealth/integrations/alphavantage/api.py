@@ -34,10 +34,12 @@ class AlphaVantageApi(BaseApi):
 
     async def update_ticker_history(self, ticker: StockTicker) -> StockTicker:
         data = await self._get_ticker_history(ticker.symbol)
-        ticker.rates = [
-            StockTickerItem(date=key, price=value.adjusted_close)  # type: ignore[arg-type]
-            for key, value in data.time_series.__root__.items()
-        ]
+        ticker.update_rates(
+            [
+                StockTickerItem(date=key, price=value.adjusted_close)  # type: ignore[arg-type]
+                for key, value in data.time_series.__root__.items()
+            ]
+        )
         return ticker
 
     async def search_ticker(self, ticker: str) -> SearchResponse:
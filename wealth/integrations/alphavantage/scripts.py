@@ -3,6 +3,7 @@ import time
 
 from wealth.database.models import StockTicker
 from wealth.logging import set_up_logging
+from wealth.stocks.cache import ticker_cache
 
 from .api import AlphaVantageApi
 
@@ -21,6 +22,7 @@ async def update_all_tickers():
             LOGGER.info(f"Updating {t.symbol} from AlphaVantage")
             t = await api.update_ticker_history(t)
             await t.save()
+            ticker_cache.invalidate(t.symbol)
             # To avoid rate limiting
             time.sleep(20)
     LOGGER.info("Done with update all ticker information")
@@ -1,33 +1,37 @@
-import json
 import logging
 from datetime import date, datetime
 
-from fastapi.encoders import jsonable_encoder
+import numpy as np
 
 from wealth.database.models import ExchangeRate
 from wealth.parameters.constants import Currency
-from wealth.util.conversion import get_rate_at_date
+from wealth.util.timeseries import DailySeries, from_day_ordinal, to_day_ordinal
 
 from .exceptions import ExchangeRateApiRuntimeException
-from .parameters import DEFAULT_CONVERSION, EXCHANGE_RATE_REFRESH_INTERVAL
+from .parameters import DEFAULT_CONVERSION, EXCHANGE_RATE_MAX_ATTEMPTS, EXCHANGE_RATE_REFRESH_INTERVAL
 
 LOGGER = logging.getLogger(__name__)
 
-RateInDict = dict[Currency, dict[date, float]]
+# The rate of every day, with weekends and holidays already forward filled
+DenseRates = dict[Currency, DailySeries]
 
 
 class Exchanger:
     last_checked: datetime | None = None
-    _rates: RateInDict = {}
+    _rates: DenseRates = {}
 
     @classmethod
-    async def get_rates(cls) -> RateInDict:
+    async def get_rates(cls) -> DenseRates:
         await cls.update_exchange_rates()
         return cls._rates
 
     @classmethod
-    async def update_exchange_rates(cls):
-        if not cls._needs_refresh():
+    async def update_exchange_rates(cls, currency: Currency | None = None):
+        """
+        Loads the rates if they are missing or outdated.
+        With a currency, the rates are only loaded when that currency needs converting.
+        """
+        if currency == Currency.EUR or not cls._needs_refresh():
             return
         await cls._update_exchange_rates()
 
@@ -36,6 +40,22 @@ class Exchanger:
         conversion_rate = await cls._get_conversion_rate_on_date(currency, currency_date)
         return amount / conversion_rate
 
+    @classmethod
+    def convert_series_to_euros(cls, amounts: np.ndarray, currency: Currency, days: np.ndarray) -> np.ndarray:
+        """
+        Converts every amount to euros with the rate of the matching day ordinal in days,
+        with the same fallbacks as a single date.
+        This does not load the rates, await update_exchange_rates(currency) first.
+        """
+        if currency == Currency.EUR:
+            return np.asarray(amounts, dtype=np.float64).copy()
+        conversion_rates = cls._get_loaded_currency_rates(currency).take(days)
+        missing = np.isnan(conversion_rates)
+        if missing.any():
+            LOGGER.warning(f"Could not convert {currency} to euros on {missing.sum()} days, using the default conversion")
+            conversion_rates[missing] = DEFAULT_CONVERSION[currency]
+        return amounts / conversion_rates
+
     @classmethod
     def _needs_refresh(cls):
         if not cls._rates:
@@ -46,19 +66,33 @@ class Exchanger:
     async def _update_exchange_rates(cls):
         rates = await ExchangeRate.find().to_list()
         cls.last_checked = datetime.now()
-        cls._rates = {item.currency: item.get_rates_in_dict() for item in rates}
+        cls._rates = {
+            item.currency: DailySeries.from_observations(*item.get_rates_in_arrays(), max_attempts=EXCHANGE_RATE_MAX_ATTEMPTS)
+            for item in rates
+        }
+
+    @classmethod
+    def _get_loaded_currency_rates(cls, currency: Currency) -> DailySeries:
+        currency_rates = cls._rates.get(currency)
+        if currency_rates is None:
+            if cls.last_checked is None:
+                raise ExchangeRateApiRuntimeException("The exchange rates are not loaded yet.")
+            raise ExchangeRateApiRuntimeException(f"Currency {currency} is not supported yet.")
+        return currency_rates
 
     @classmethod
     async def _get_conversion_rate_on_date(cls, currency: Currency, currency_date: date) -> float:
         if currency == Currency.EUR:
             return 1
-        rates = await cls.get_rates()
-        currency_rates = rates.get(currency)
-        if currency_rates is None:
-            raise ExchangeRateApiRuntimeException(f"Currency {currency} is not supported yet.")
-        exchange_rate = get_rate_at_date(currency_rates, currency_date)
-        if exchange_rate is not None:
+        await cls.update_exchange_rates()
+        currency_rates = cls._get_loaded_currency_rates(currency)
+        exchange_rate = currency_rates.at(to_day_ordinal(currency_date))
+        if not np.isnan(exchange_rate):
             return exchange_rate
         LOGGER.warning(f"Could not convert to {currency} to euros on {currency_date}")
-        LOGGER.debug(f"Current rates for {currency} are: {json.dumps(jsonable_encoder(currency_rates))}")
+        if currency_rates.values.size:
+            LOGGER.debug(
+                f"Current rates for {currency} run from {from_day_ordinal(currency_rates.start).date()}"
+                f" to {from_day_ordinal(currency_rates.end).date()}"
+            )
         return DEFAULT_CONVERSION[currency]
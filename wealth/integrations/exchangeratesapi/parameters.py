@@ -11,3 +11,5 @@ EARLIEST_DATE = "2000-01-01"
 
 DEFAULT_CONVERSION = {Currency.SEK: 10, Currency.USD: 1.2, Currency.GBP: 0.8, Currency.DKK: 7}
 EXCHANGE_RATE_REFRESH_INTERVAL = timedelta(days=1)
+# How many days back to look for a rate (weekends, holidays) before using the default conversion
+EXCHANGE_RATE_MAX_ATTEMPTS = 14
@@ -1,9 +1,12 @@
 import asyncio
 import logging
 
+import numpy as np
 from dateutil.parser import parser
 
-from wealth.database.models import Account, AccountSource, TinkCredentialStatus, User, WealthItem
+from wealth.database.balances import save_changed_balances
+from wealth.database.models import Account, AccountSource, BalanceSeries, TinkCredentialStatus, User, WealthItem
+from wealth.database.users import bump_data_version, content_hash, save_if_changed
 from wealth.integrations.exchangeratesapi.dependency import Exchanger
 from wealth.integrations.tink.api import TinkApi, TinkLinkApi, TinkServerApi
 from wealth.integrations.tink.exceptions import TinkRuntimeException
@@ -112,15 +115,22 @@ class TinkLogic:
             types=[StatisticType.balance_by_account],
         )
         response = await self.api.get_statistics(request)
+        currency = Currency(account.currency)
+        await rates.update_exchange_rates(currency)
+        amounts_in_euro = rates.convert_series_to_euros(
+            np.fromiter((item.value for item in response), dtype=np.float64, count=len(response)),
+            currency,
+            np.fromiter((item.period.toordinal() for item in response), dtype=np.int64, count=len(response)),
+        )
         return [
             WealthItem(
                 date=item.period,  # type: ignore[arg-type]
                 amount=item.value,
-                amount_in_euro=await rates.convert_to_euros_on_date(item.value, Currency(account.currency), item.period),
-                currency=Currency(account.currency),
+                amount_in_euro=amount_in_euro,
+                currency=currency,
                 raw=item.json(),
             )
-            for item in response
+            for item, amount_in_euro in zip(response, amounts_in_euro.tolist())
         ]
 
     async def get_accounts(self) -> list[Account]:
@@ -221,7 +231,11 @@ class TinkLogic:
         return await self.get_account_balances(account)
 
     async def _update_accounts(self, user: User, accounts: list[Account]) -> User:
-        new_balances_list = [await self.get_wealth_items_for_account(account) for account in accounts]
+        previous_hash = content_hash(user)
+        new_balances_list = [
+            BalanceSeries.from_items(await self.get_wealth_items_for_account(account), account.currency) for account in accounts
+        ]
+        updated_accounts: list[Account] = []
         for account, new_balances in zip(accounts, new_balances_list):
             for existing_account in user.accounts:
                 if account == existing_account:
@@ -229,12 +243,19 @@ class TinkLogic:
                     existing_account.credential_id = account.credential_id
                     existing_account.credential_status = account.credential_status
                     existing_account.balances = new_balances
+                    updated_accounts.append(existing_account)
                     break
             else:
                 account.balances = new_balances
                 user.accounts.append(account)
-
-        await user.save()
+                updated_accounts.append(account)
+
+        # The balances go first, saving the user bumps its data version once they are all stored.
+        # Only what changed is written, most daily refreshes change nothing.
+        changed = await save_changed_balances(user, {a.asset_id: a.balances for a in updated_accounts})
+        if not await save_if_changed(user, previous_hash) and changed:
+            await bump_data_version(user)
+        LOGGER.info(f"Stored the balances of {len(changed)} of {len(updated_accounts)} accounts, the others did not change")
         return user
 
     async def update_acccounts_of_credential(self, user: User, credential_id: str) -> User:
@@ -284,14 +305,15 @@ class TinkLogic:
     async def update_all_credential_statuses(self, user: User) -> User:
         """
         Updates the credential status of all accounts of the user.
-        The will also save the user in the database
+        This also saves the user in the database if any status changed
         """
         LOGGER.info("Checking and updating all the Tink credentials")
+        previous_hash = content_hash(user)
 
         code = await self.server.get_access_token_for_user(user.tink_user_id)
         await self.initialise_tink_api(code)
 
         for c in {a.credential_id for a in user.accounts if a}:
             user = await self.update_credential_status(user, c)
-        await user.save()
+        await save_if_changed(user, previous_hash)
         return user
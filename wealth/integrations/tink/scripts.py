@@ -15,13 +15,17 @@ async def update_tink_for_all_users():
     if not users:
         return
 
+    # The updates only write the users whose accounts or balances changed, which bumps their data version
+    versions = {u.id: u.data_version for u in users}
     futures = [update_tink_for_user(u) for u in users]
     updated_users = await asyncio.gather(*futures, return_exceptions=True)
-    await asyncio.gather(*[u.save() for u in updated_users if not isinstance(u, Exception)])
 
     exceptions = [u for u in updated_users if isinstance(u, Exception)]
     for e in exceptions:
         LOGGER.error(e)
+    updated = [u for u in updated_users if not isinstance(u, Exception)]
+    changed = [u for u in updated if u.data_version != versions[u.id]]
+    LOGGER.info(f"{len(changed)} users changed, skipped writing {len(updated) - len(changed)} unchanged users")
     LOGGER.info("Done with the update tink information for all users")
 
 
@@ -3,16 +3,18 @@ import uvicorn  # type: ignore
 from config2.config import config
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi_jwt_auth.exceptions import AuthJWTException
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 
+from .banking.scripts import move_account_balances_to_collection
 from .database.api import init_database
 from .logging import set_up_logging
 from .parameters import env
 from .routers import router
+from .util.exceptions import NotModifiedException
+from .util.middleware import EncodingAwareGZipMiddleware
 from .util.openapi import create_custom_api
 
 set_up_logging()
@@ -29,7 +31,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.add_middleware(GZipMiddleware)
+app.add_middleware(EncodingAwareGZipMiddleware)
 if env.SENTRY_DSN:
     sentry_sdk.init(dsn=env.SENTRY_DSN)
     app.add_middleware(SentryAsgiMiddleware)
@@ -38,6 +40,7 @@ if env.SENTRY_DSN:
 @app.on_event("startup")
 async def init_db():
     await init_database()
+    await move_account_balances_to_collection()
 
 
 @app.exception_handler(AuthJWTException)
@@ -46,5 +49,11 @@ def authjwt_exception_handler(request: Request, exc: AuthJWTException):
     return JSONResponse(status_code=exc.status_code, content={"detail": exc.message, "error_type": "authentication"})
 
 
+@app.exception_handler(NotModifiedException)
+# pylint: disable=unused-argument
+def not_modified_exception_handler(request: Request, exc: NotModifiedException):
+    return Response(status_code=exc.status_code, headers=exc.headers)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
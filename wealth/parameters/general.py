@@ -8,3 +8,31 @@ class GeneralParameters:
 
 class AccountSource(str, Enum):
     tink = "tink"
+
+
+class Resolution(str, Enum):
+    daily = "daily"
+    weekly = "weekly"
+    monthly = "monthly"
+    yearly = "yearly"
+
+
+class Aggregation(str, Enum):
+    last = "last"
+    mean = "mean"
+
+
+class BalanceFormat(str, Enum):
+    items = "items"
+    columnar = "columnar"
+
+
+class ExportFormat(str, Enum):
+    arrow = "arrow"
+    parquet = "parquet"
+
+
+class AssetType(str, Enum):
+    account = "account"
+    stock_position = "stock_position"
+    custom_asset = "custom_asset"
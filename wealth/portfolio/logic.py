@@ -0,0 +1,65 @@
+from typing import AsyncIterator
+
+import numpy as np
+
+from wealth.custom_assets.logic import materialize_balances as materialize_asset_balances
+from wealth.database.balances import iterate_balances, materialize_account_balances
+from wealth.database.models import BalanceSeries, User
+from wealth.parameters.constants import Currency
+from wealth.parameters.general import AssetType
+from wealth.stocks.logic import materialize_balances as materialize_position_balances
+from wealth.util.export import AssetBalances
+from wealth.util.timeseries import forward_fill
+
+
+async def materialize_user_balances(user: User) -> User:
+    """
+    Sets the balances of all assets of the user
+    """
+    await materialize_account_balances(user, [a for a in user.accounts if a.is_active])
+    for position in user.stock_positions:
+        await materialize_position_balances(position)
+    for asset in user.custom_assets:
+        await materialize_asset_balances(asset)
+    return user
+
+
+async def iterate_net_worth(user: User) -> AsyncIterator[BalanceSeries]:
+    """
+    Yields the net worth of the user, only computing it once it is iterated
+    """
+    await materialize_user_balances(user)
+    yield calculate_net_worth([a.balances for a in user.assets])
+
+
+async def iterate_asset_balances(user: User) -> AsyncIterator[AssetBalances]:
+    """
+    Yields the balances of every asset of the user, materializing them one asset at a time
+    """
+    assert user.id is not None
+    accounts = [a.asset_id for a in user.accounts if a.is_active]
+    async for asset_id, balances in iterate_balances(user.id, accounts):
+        yield AssetBalances(AssetType.account, asset_id, balances)
+    for position in user.stock_positions:
+        yield AssetBalances(AssetType.stock_position, position.asset_id, await materialize_position_balances(position))
+    for asset in user.custom_assets:
+        yield AssetBalances(AssetType.custom_asset, asset.asset_id, await materialize_asset_balances(asset))
+
+
+def calculate_net_worth(balances: list[BalanceSeries]) -> BalanceSeries:
+    """
+    Sums the balances in euro of all assets on every day.
+    Each asset counts from its first balance on, and keeps its last balance on days without one.
+    """
+    balances = [b for b in balances if b]
+    if not balances:
+        return BalanceSeries.empty()
+    start = min(b.start for b in balances)
+    axis = np.arange(start, max(b.end for b in balances) + 1, dtype=np.int64)
+
+    total = np.zeros(axis.size)
+    for series in balances:
+        known = ~np.isnan(series.amount_in_euro)
+        filled = forward_fill(series.start + np.flatnonzero(known), series.amount_in_euro[known], axis)
+        total += np.nan_to_num(filled)
+    return BalanceSeries(start, Currency.EUR, total, total)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+
+from wealth.authentication import check_etag, get_cached_user
+from wealth.database.models import User
+from wealth.parameters.general import ExportFormat
+from wealth.util.export import ExportStreamingResponse
+from wealth.util.query import BalanceQuery
+from wealth.util.responses import BalanceResponse
+from wealth.util.types import Balances
+
+from .logic import iterate_asset_balances, iterate_net_worth
+
+router = APIRouter()
+
+
+@router.get("/net-worth", response_model=Balances, response_class=BalanceResponse, dependencies=[Depends(check_etag)])
+async def get_net_worth(user: User = Depends(get_cached_user), query: BalanceQuery = Depends()):
+    return query.stream(iterate_net_worth(user))
+
+
+@router.get("/export", response_class=ExportStreamingResponse)
+async def export_balances(
+    user: User = Depends(get_cached_user),
+    export_format: ExportFormat = Query(
+        ExportFormat.arrow, alias="format", description="An Arrow IPC stream or a Parquet file"
+    ),
+    etag: str = Depends(check_etag),
+):
+    return ExportStreamingResponse(iterate_asset_balances(user), export_format, headers={"ETag": etag})
@@ -4,6 +4,7 @@ from .authentication import views as auth_views
 from .banking import views as banking_views
 from .custom_assets import views as asset_views
 from .integrations.tink import views as tink_views
+from .portfolio import views as portfolio_views
 from .stocks import views as stock_views
 
 router = APIRouter()
@@ -13,3 +14,4 @@ router.include_router(auth_views.router, prefix="/auth", tags=["auth"])
 router.include_router(banking_views.router, prefix="/banking", tags=["banking"])
 router.include_router(stock_views.router, prefix="/stocks", tags=["stocks"])
 router.include_router(asset_views.router, prefix="/custom", tags=["custom-assets"])
+router.include_router(portfolio_views.router, prefix="/portfolio", tags=["portfolio"])
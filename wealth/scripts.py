@@ -3,14 +3,14 @@ import logging
 
 import sentry_sdk
 
-from wealth.custom_assets.scripts import update_all_custom_asset_balances
+from wealth.banking.scripts import move_account_balances_to_collection
 from wealth.database.api import init_database
+from wealth.database.scripts import bump_all_data_versions, remove_embedded_asset_balances
 from wealth.integrations.alphavantage.scripts import update_all_tickers
 from wealth.integrations.exchangeratesapi.scripts import import_from_ecb
 from wealth.integrations.tink.scripts import update_tink_for_all_users
 from wealth.logging import set_up_logging
 from wealth.parameters import env
-from wealth.stocks.scripts import update_all_stock_balances
 
 set_up_logging()
 LOGGER = logging.getLogger(__name__)
@@ -25,11 +25,12 @@ async def init():
 async def run_daily_scripts():
     await init()
     scripts = [
+        move_account_balances_to_collection,
+        remove_embedded_asset_balances,
         import_from_ecb,
         update_all_tickers,
-        update_all_stock_balances,
         update_tink_for_all_users,
-        update_all_custom_asset_balances,
+        bump_all_data_versions,
     ]
     for function in scripts:
         try:
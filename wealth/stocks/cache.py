@@ -0,0 +1,49 @@
+from datetime import date
+
+import numpy as np
+
+from wealth.database.models import BalanceSeries, StockTicker
+from wealth.parameters.constants import Currency
+from wealth.util.cache import LruCache
+
+from .parameters import BALANCE_CACHE_MAX_BYTES, TICKER_CACHE_MAX_AGE, TICKER_CACHE_MAX_BYTES
+
+
+class TickerPrices:
+    """The price history of a ticker as compact arrays of day ordinals and prices"""
+
+    __slots__ = ("symbol", "currency", "days", "prices", "history_version")
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self, symbol: str, currency: Currency, days: np.ndarray, prices: np.ndarray, history_version: int = 0
+    ):
+        self.symbol = symbol
+        self.currency = currency
+        self.days = days
+        self.prices = prices
+        self.history_version = history_version
+
+    @classmethod
+    def from_ticker(cls, ticker: StockTicker) -> "TickerPrices":
+        days, prices = ticker.get_rates_in_arrays()
+        return cls(ticker.symbol, ticker.currency, days, prices, ticker.history_version)
+
+    @property
+    def last_day(self) -> int:
+        """The day ordinal of the latest price, 0 without prices"""
+        return int(self.days.max()) if self.days.size else 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.days.nbytes + self.prices.nbytes
+
+
+ticker_cache: LruCache[str, TickerPrices] = LruCache(
+    TICKER_CACHE_MAX_BYTES, lambda prices: prices.nbytes, max_age=TICKER_CACHE_MAX_AGE
+)
+
+# Keyed by the inputs of the balances: symbol, history version, day of the last price, amount, start date
+# and the day they were computed on. The last price day changes when the daily scripts append a price.
+balance_cache: LruCache[tuple[str, int, int, float, date, date], BalanceSeries] = LruCache(
+    BALANCE_CACHE_MAX_BYTES, lambda balances: balances.nbytes, max_age=TICKER_CACHE_MAX_AGE
+)
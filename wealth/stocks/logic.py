@@ -1,13 +1,17 @@
+import asyncio
 import logging
-from datetime import date, timedelta
+from datetime import date
 
+import numpy as np
 from dateutil.parser import parser
 
-from wealth.database.models import StockPosition, StockTicker, WealthItem
+from wealth.database.models import BalanceSeries, StockPosition, StockTicker
 from wealth.integrations.alphavantage.api import AlphaVantageApi
 from wealth.integrations.exchangeratesapi.dependency import Exchanger
-from wealth.util.conversion import get_rate_at_date
+from wealth.util.timeseries import day_axis, forward_fill, to_day_ordinal
 
+from .cache import TickerPrices, balance_cache, ticker_cache
+from .parameters import PRICE_MAX_ATTEMPTS
 from .types import SearchItem
 
 LOGGER = logging.getLogger(__name__)
@@ -15,40 +19,107 @@ LOGGER = logging.getLogger(__name__)
 rates = Exchanger()
 date_parser = parser()
 
+# The loads in flight by symbol, so concurrent positions on the same ticker share one load instead of all missing the cache.
+# A load removes itself once it is done, so only the tickers being loaded are kept.
+_loading_tickers: dict[str, asyncio.Future[TickerPrices]] = {}
 
-async def populate_stock_balances(position: StockPosition) -> list[WealthItem]:
-    ticker = await get_or_create_stock_ticker(position.ticker)
-    current_date = position.start_date.date()
-    today = date.today()
-    balances: list[WealthItem] = []
-    last_amount = None
-    while current_date <= today:
-        ticker_position = get_rate_at_date(ticker.get_rates_in_dict(), current_date)
-        if ticker_position is not None:
-            new_amount = position.amount * ticker_position
-            balances.append(
-                WealthItem(
-                    date=current_date,  # type: ignore[arg-type]
-                    amount=new_amount,
-                    amount_in_euro=await rates.convert_to_euros_on_date(new_amount, ticker.currency, current_date),
-                    currency=ticker.currency,
-                )
-            )
-            last_amount = new_amount
-        elif last_amount is not None:
-            # Just add the same thing from the last time
-            balances.append(
-                WealthItem(
-                    date=current_date,  # type: ignore[arg-type]
-                    amount=last_amount,
-                    amount_in_euro=await rates.convert_to_euros_on_date(last_amount, ticker.currency, current_date),
-                    currency=ticker.currency,
-                )
-            )
-        current_date += timedelta(days=1)
+
+async def materialize_balances(position: StockPosition) -> BalanceSeries:
+    """
+    Sets the balances of the position, computed from the shared ticker prices and exchange rates.
+    Positions with the same ticker, amount and start date share the cached balances for the rest of the day.
+    """
+    ticker = await get_ticker_prices(position.ticker)
+    key = (ticker.symbol, ticker.history_version, ticker.last_day, position.amount, position.start_date.date(), date.today())
+    balances = balance_cache.get(key)
+    if balances is None:
+        balances = await _calculate_stock_balances(position, ticker)
+        balance_cache.set(key, balances)
+    position.balances = balances
     return balances
 
 
+async def materialize_last_balance(position: StockPosition) -> BalanceSeries:
+    """
+    Sets the balances of the position to only its last balance, which is all current_value needs,
+    without calculating the rest of its history
+    """
+    ticker = await get_ticker_prices(position.ticker)
+    days, amounts = calculate_last_stock_amount(position, ticker.days, ticker.prices, date.today())
+    position.balances = await BalanceSeries.from_amounts(days, amounts, ticker.currency, rates)
+    return position.balances
+
+
+async def populate_stock_balances(position: StockPosition) -> BalanceSeries:
+    ticker = await get_ticker_prices(position.ticker)
+    return await _calculate_stock_balances(position, ticker)
+
+
+async def _calculate_stock_balances(position: StockPosition, ticker: TickerPrices) -> BalanceSeries:
+    days, amounts = calculate_stock_amounts(position, ticker.days, ticker.prices, date.today())
+    return await BalanceSeries.from_amounts(days, amounts, ticker.currency, rates)
+
+
+def calculate_stock_amounts(
+    position: StockPosition, price_days: np.ndarray, prices: np.ndarray, end_date: date
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the value of the position on every day from its start date until the end date.
+    Prices are carried forward over days without a price (weekends, holidays).
+    The position only starts counting from the first day with a price in the last PRICE_MAX_ATTEMPTS days.
+    Returns the day ordinals and the value of the position on those days.
+    """
+    days = day_axis(position.start_date, end_date)
+
+    recent_prices = forward_fill(price_days, prices, days, max_attempts=PRICE_MAX_ATTEMPTS)
+    priced = np.flatnonzero(~np.isnan(recent_prices))
+    if not priced.size:
+        return days[:0], np.empty(0)
+    days = days[priced[0] :]
+    return days, position.amount * forward_fill(price_days, prices, days)
+
+
+def calculate_last_stock_amount(
+    position: StockPosition, price_days: np.ndarray, prices: np.ndarray, end_date: date
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The last day and value of calculate_stock_amounts, without calculating the days before it.
+    Once the position starts counting, prices are carried forward without limit,
+    so it has a value on the end date if the latest price before it is within PRICE_MAX_ATTEMPTS of the start date.
+    """
+    start, end = to_day_ordinal(position.start_date), to_day_ordinal(end_date)
+    known = price_days[price_days <= end]
+    if start > end or not known.size or known.max() <= start - PRICE_MAX_ATTEMPTS:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    days = np.array([end])
+    return days, position.amount * forward_fill(price_days, prices, days)
+
+
+async def get_ticker_prices(symbol: str) -> TickerPrices:
+    """
+    Returns the price history of the ticker from the in-process cache,
+    loading or creating the ticker when it is not cached
+    """
+    prices = ticker_cache.get(symbol)
+    if prices is not None:
+        return prices
+    loading = _loading_tickers.get(symbol)
+    if loading is None:
+        loading = asyncio.ensure_future(_load_ticker_prices(symbol))
+        _loading_tickers[symbol] = loading
+    # Shielded, as the other positions waiting for the same ticker should not be cancelled with this one
+    return await asyncio.shield(loading)
+
+
+async def _load_ticker_prices(symbol: str) -> TickerPrices:
+    try:
+        prices = TickerPrices.from_ticker(await get_or_create_stock_ticker(symbol))
+    finally:
+        del _loading_tickers[symbol]
+    ticker_cache.set(symbol, prices)
+    return prices
+
+
 async def get_or_create_stock_ticker(ticker: str) -> StockTicker:
     stock_ticker = await StockTicker.find_one(StockTicker.symbol == ticker)
     if stock_ticker:
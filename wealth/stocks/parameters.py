@@ -0,0 +1,11 @@
+from datetime import timedelta
+from os import environ
+
+# How many days back to look for a price before the position starts counting
+PRICE_MAX_ATTEMPTS = 14
+
+TICKER_CACHE_MAX_BYTES = int(environ.get("TICKER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Tickers are updated by the daily scripts in another process, so cached prices expire
+TICKER_CACHE_MAX_AGE = timedelta(hours=1)
+
+BALANCE_CACHE_MAX_BYTES = int(environ.get("STOCK_BALANCE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
@@ -3,15 +3,6 @@ from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
 
-from wealth.parameters.constants import Currency
-
-
-class WealthItem(BaseModel):
-    date: date
-    amount: float
-    amount_in_euro: float = 0
-    currency: Currency
-
 
 class StockPositionRequest(BaseModel):
     amount: float
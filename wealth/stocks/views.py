@@ -1,23 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from wealth.authentication import get_authenticated_user
+from wealth.authentication import check_etag, get_authenticated_projection, get_authenticated_user, get_cached_user
 from wealth.database.models import StockPosition as DBStockPosition
-from wealth.database.models import User
-from wealth.database.models import WealthItem as WealthItemDB
+from wealth.database.models import User, UserStockPositions
+from wealth.database.users import pull_asset, push_asset, set_asset_fields
 from wealth.integrations.alphavantage.exceptions import TickerNotFoundException
 from wealth.util.exceptions import NotFoundException
+from wealth.util.query import BalancePage, BalanceQuery
+from wealth.util.responses import BalanceResponse
+from wealth.util.types import Balances
 
-from .logic import populate_stock_balances, search_ticker
-from .types import SearchItem, StockPositionRequest, StockPositionResponse, StockPositionUpdate, WealthItem
+from .logic import materialize_balances, materialize_last_balance, search_ticker
+from .types import SearchItem, StockPositionRequest, StockPositionResponse, StockPositionUpdate
 
 router = APIRouter()
 
 
-@router.get("/positions", response_model=list[StockPositionResponse])
-async def get_positions(user: User = Depends(get_authenticated_user)):
+@router.get("/positions", response_model=list[StockPositionResponse], dependencies=[Depends(check_etag)])
+async def get_positions(user: UserStockPositions = Depends(get_authenticated_projection(UserStockPositions))):
     all_positions = user.stock_positions
     serialized_positions: list[dict] = []
     for db_position in all_positions:
+        await materialize_last_balance(db_position)
         serialized = db_position.dict()
         serialized["current_value"] = db_position.current_value
         serialized["current_value_in_euro"] = db_position.current_value_in_euro
@@ -25,11 +29,12 @@ async def get_positions(user: User = Depends(get_authenticated_user)):
     return serialized_positions
 
 
-@router.get("/positions/{position_id}", response_model=StockPositionResponse)
-async def get_position(position_id: str, user: User = Depends(get_authenticated_user)):
+@router.get("/positions/{position_id}", response_model=StockPositionResponse, dependencies=[Depends(check_etag)])
+async def get_position(position_id: str, user: User = Depends(get_cached_user)):
     position = user.find_stock_position(position_id)
     if position is None:
         raise NotFoundException()
+    await materialize_balances(position)
     serialized = position.dict()
     serialized["current_value"] = position.current_value
     serialized["current_value_in_euro"] = position.current_value_in_euro
@@ -39,12 +44,9 @@ async def get_position(position_id: str, user: User = Depends(get_authenticated_
 @router.post("/positions", response_model=StockPositionResponse, status_code=status.HTTP_201_CREATED)
 async def create_position(position: StockPositionRequest, user: User = Depends(get_authenticated_user)):
     db_position = DBStockPosition(**position.dict())
-    try:
-        db_position.balances = await populate_stock_balances(db_position)
-    except TickerNotFoundException as e:
-        raise HTTPException(422, {"ticker": f"Ticker symbol not found ({e.ticker})"})  # pylint: disable=raise-missing-from
+    await _materialize_position(db_position)
     user.stock_positions.append(db_position)
-    await user.save()
+    await push_asset(user, db_position)
     serialized = db_position.dict()
     serialized["current_value"] = db_position.current_value
     serialized["current_value_in_euro"] = db_position.current_value_in_euro
@@ -60,11 +62,11 @@ async def update_position(
         raise NotFoundException()
     if not updated_position.dict(exclude_none=True):
         return db_position
-    for key, value in updated_position:
-        if value is not None:
-            setattr(db_position, key, value)
-    db_position.balances = await populate_stock_balances(db_position)
-    await user.save()
+    fields = [key for key, value in updated_position if value is not None]
+    for key in fields:
+        setattr(db_position, key, getattr(updated_position, key))
+    await _materialize_position(db_position)
+    await set_asset_fields(user, db_position, fields)
     serialized = db_position.dict()
     serialized["current_value"] = db_position.current_value
     serialized["current_value_in_euro"] = db_position.current_value_in_euro
@@ -77,26 +79,41 @@ async def delete_position(position_id: str, user: User = Depends(get_authenticat
     if db_position is None:
         raise NotFoundException()
     user.stock_positions = [position for position in user.stock_positions if position != db_position]
-    await user.save()
-
-
-@router.get("/positions/{position_id}/balances", response_model=list[WealthItem])
-async def get_position_balances(position_id: str, user: User = Depends(get_authenticated_user)):
+    await pull_asset(user, db_position)
+
+
+@router.get(
+    "/positions/{position_id}/balances",
+    response_model=Balances,
+    response_class=BalanceResponse,
+    dependencies=[Depends(check_etag)],
+)
+async def get_position_balances(
+    position_id: str,
+    user: User = Depends(get_cached_user),
+    query: BalanceQuery = Depends(),
+    page: BalancePage = Depends(),
+):
     db_position = user.find_stock_position(position_id)
     if db_position is None:
         raise NotFoundException()
-    return db_position.balances
+    return query.respond_page(await materialize_balances(db_position), page)
 
 
-@router.get("/balances", response_model=list[WealthItem])
-async def get_balances(user: User = Depends(get_authenticated_user)):
-    balances: list[WealthItemDB] = []
-    for p in user.stock_positions:
-        balances += p.balances
-    return balances
+@router.get("/balances", response_model=Balances, response_class=BalanceResponse, dependencies=[Depends(check_etag)])
+async def get_balances(user: User = Depends(get_cached_user), query: BalanceQuery = Depends()):
+    return query.stream(await materialize_balances(p) for p in user.stock_positions)
 
 
 @router.get("/search/{ticker}", response_model=list[SearchItem], response_model_by_alias=False)
-async def search_ticker_view(ticker: str, _: User = Depends(get_authenticated_user)):
+async def search_ticker_view(ticker: str, _: User = Depends(get_cached_user)):
     result = await search_ticker(ticker)
     return [i.dict() for i in result]
+
+
+async def _materialize_position(position: DBStockPosition):
+    """Materializes the balances of the position before it is written, answering 422 when its ticker does not exist"""
+    try:
+        await materialize_balances(position)
+    except TickerNotFoundException as e:
+        raise HTTPException(422, {"ticker": f"Ticker symbol not found ({e.ticker})"})  # pylint: disable=raise-missing-from
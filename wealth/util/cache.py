@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LruCache(Generic[K, V]):
+    """
+    An in-process cache bounded by the total size of its values in bytes.
+    When it is full, the least recently used values are evicted first.
+    With max_age, values older than that are treated as missing.
+    """
+
+    def __init__(self, max_bytes: int, get_size: Callable[[V], int], max_age: timedelta | None = None):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._get_size = get_size
+        self._items: OrderedDict[K, tuple[V, int, datetime]] = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._items
+
+    def get(self, key: K) -> V | None:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, _, stored_at = item
+        if self.max_age is not None and stored_at < datetime.now() - self.max_age:
+            self.invalidate(key)
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V):
+        self.invalidate(key)
+        size = self._get_size(value)
+        if size > self.max_bytes:
+            return
+        self._items[key] = (value, size, datetime.now())
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._items.popitem(last=False)
+            self.current_bytes -= evicted_size
+
+    def invalidate(self, key: K):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.current_bytes -= item[1]
+
+    def clear(self):
+        self._items.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "items": len(self._items), "bytes": self.current_bytes}
@@ -33,3 +33,8 @@ class ApiException(HTTPException, WealthException):
 class NotFoundException(ApiException):
     def __init__(self, status_code=404, detail=None, headers=None):
         super().__init__(status_code, detail=detail, headers=headers)
+
+
+class NotModifiedException(ApiException):
+    def __init__(self, etag: str):
+        super().__init__(304, headers={"ETag": etag})
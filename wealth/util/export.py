@@ -0,0 +1,131 @@
+import io
+from datetime import date
+from typing import AsyncIterable, AsyncIterator, NamedTuple
+from uuid import UUID
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.responses import StreamingResponse
+
+from wealth.database.models import BalanceSeries
+from wealth.parameters.general import AssetType, ExportFormat
+
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("asset_id", pa.string()),
+        ("asset_type", pa.string()),
+        ("date", pa.date32()),
+        ("amount", pa.float64()),
+        ("amount_in_euro", pa.float64()),
+        ("currency", pa.string()),
+    ]
+)
+
+_MEDIA_TYPES = {
+    ExportFormat.arrow: "application/vnd.apache.arrow.stream",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+_EXTENSIONS = {ExportFormat.arrow: "arrows", ExportFormat.parquet: "parquet"}
+
+# date32 counts the days since the unix epoch
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+class AssetBalances(NamedTuple):
+    """The balances of one asset of a user"""
+
+    asset_type: AssetType
+    asset_id: UUID
+    balances: BalanceSeries
+
+
+def to_record_batch(asset: AssetBalances) -> pa.RecordBatch:
+    """
+    Converts the balances of the asset to a record batch of EXPORT_SCHEMA, one row per day with a balance.
+    All columns are built from array buffers, without a Python object per row.
+    """
+    balances = asset.balances
+    known = np.flatnonzero(~np.isnan(balances.amount))
+    return pa.RecordBatch.from_arrays(
+        [
+            _repeat(str(asset.asset_id), known.size),
+            _repeat(asset.asset_type.value, known.size),
+            pa.array((balances.start + known - _EPOCH).astype(np.int32), type=pa.date32()),
+            pa.array(balances.amount[known]),
+            pa.array(balances.amount_in_euro[known]),
+            _repeat(balances.currency.value, known.size),
+        ],
+        schema=EXPORT_SCHEMA,
+    )
+
+
+def _repeat(value: str, length: int) -> pa.StringArray:
+    """A string column with the same value in every row, built from its offsets and data buffers"""
+    encoded = value.encode()
+    offsets = np.arange(length + 1, dtype=np.int32) * len(encoded)
+    return pa.StringArray.from_buffers(length, pa.py_buffer(offsets), pa.py_buffer(encoded * length))
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    A write-only file that hands out what was written to it since the last take.
+    Keeps counting the position, which the Parquet writer uses for the offsets in its footer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        chunks, self._chunks = self._chunks, []
+        return b"".join(chunks)
+
+
+async def write_export(assets: AsyncIterable[AssetBalances], export_format: ExportFormat) -> AsyncIterator[bytes]:
+    """
+    Writes the balances of the assets as an Arrow IPC stream or a Parquet file,
+    yielding what was written after every asset, so only the balances of one asset are in memory at a time
+    """
+    sink = _ChunkSink()
+    writer: pa.ipc.RecordBatchStreamWriter | pq.ParquetWriter
+    if export_format == ExportFormat.parquet:
+        writer = pq.ParquetWriter(sink, EXPORT_SCHEMA)
+    else:
+        writer = pa.ipc.new_stream(sink, EXPORT_SCHEMA)
+    async for asset in assets:
+        batch = to_record_batch(asset)
+        if batch.num_rows:
+            writer.write_batch(batch)
+            yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+class ExportStreamingResponse(StreamingResponse):
+    """
+    Streams the balances of the assets as a file download in the export format
+    """
+
+    def __init__(
+        self,
+        assets: AsyncIterable[AssetBalances],
+        export_format: ExportFormat = ExportFormat.arrow,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+    ):
+        super().__init__(write_export(assets, export_format), status_code, headers, media_type=_MEDIA_TYPES[export_format])
+        self.headers["Content-Disposition"] = f'attachment; filename="balances.{_EXTENSIONS[export_format]}"'
@@ -0,0 +1,29 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+
+class EncodingAwareGZipMiddleware(GZipMiddleware):
+    """
+    A GZipMiddleware that leaves responses alone that already have a Content-Encoding,
+    like the cached responses that are stored gzipped
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _EncodingAwareGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+class _EncodingAwareGZipResponder(GZipResponder):
+    passthrough = False
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start" and "content-encoding" in Headers(raw=message["headers"]):
+            self.passthrough = True
+        if self.passthrough:
+            await self.send(message)
+            return
+        await super().send_with_gzip(message)
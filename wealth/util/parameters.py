@@ -0,0 +1,9 @@
+from datetime import timedelta
+from os import environ
+
+RESPONSE_CACHE_MAX_BYTES = int(environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# The bodies are built from the in-process ticker and balance caches, which expire after an hour,
+# so a body cached under a new data version does not outlive the prices it was computed from
+RESPONSE_CACHE_MAX_AGE = timedelta(hours=1)
+# Compressing the cached responses is done once per version of the data, so it can be thorough
+RESPONSE_CACHE_COMPRESS_LEVEL = 9
@@ -0,0 +1,131 @@
+import base64
+from datetime import date
+from typing import AsyncIterable
+
+import numpy as np
+from fastapi import Depends, HTTPException, Query, status
+
+from wealth.authentication import check_etag
+from wealth.database.models import BalanceSeries
+from wealth.parameters.general import Aggregation, BalanceFormat, Resolution
+
+from .responses import BalanceResponse, BalanceStreamingResponse, GzippedResponse, SelectedBalances, response_cache
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class BalanceQuery:
+    """
+    The date range and resolution of the balances to return, from the query parameters of the balance routes,
+    and the ETag of the response, see check_etag
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        start: date | None = Query(None, alias="from", description="The first day to return balances for"),
+        end: date | None = Query(None, alias="to", description="The last day to return balances for"),
+        resolution: Resolution = Query(Resolution.daily, description="Returns one balance per day, week, month or year"),
+        aggregation: Aggregation = Query(
+            Aggregation.last, description="Whether a week, month or year gets its last balance, or the mean of its balances"
+        ),
+        balance_format: BalanceFormat = Query(
+            BalanceFormat.items,
+            alias="format",
+            description="A list of balances, or per asset one object with the dates and amounts as arrays",
+        ),
+        etag: str | None = Depends(check_etag),
+    ):
+        if start is not None and end is not None and start > end:
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, {"from": "Must be before to"})
+        self.start = start
+        self.end = end
+        self.resolution = resolution
+        self.aggregation = aggregation
+        self.balance_format = balance_format
+        self.etag = etag
+
+    def select(self, balances: BalanceSeries) -> SelectedBalances:
+        return SelectedBalances(balances.currency, *balances.select(self.start, self.end, self.resolution, self.aggregation))
+
+    def respond(self, balances: list[SelectedBalances]) -> BalanceResponse:
+        return BalanceResponse(balances, self.balance_format, headers=self._headers())
+
+    def respond_page(self, balances: BalanceSeries, page: "BalancePage") -> BalanceResponse:
+        selected, next_cursor = page.paginate(self.select(balances))
+        response = self.respond([selected])
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return response
+
+    def stream(self, balances: AsyncIterable[BalanceSeries]) -> BalanceStreamingResponse | GzippedResponse:
+        """
+        Streams the balances, or sends the cached body of an earlier response with the same ETag.
+        The balances are only iterated when they are not cached, so pass them lazily.
+        """
+        if self.etag is not None:
+            cached = response_cache.get(self.etag)
+            if cached is not None:
+                return GzippedResponse(cached, headers=self._headers())
+        return BalanceStreamingResponse(
+            (self.select(series) async for series in balances),
+            self.balance_format,
+            headers=self._headers(),
+            cache_key=self.etag,
+        )
+
+    def _headers(self) -> dict[str, str] | None:
+        return {"ETag": self.etag} if self.etag else None
+
+
+class BalancePage:
+    """
+    Cursor pagination of the balances of one asset, newest first, from the query parameters of the balance routes.
+    The cursor of the next page is sent in the NEXT_CURSOR_HEADER of the response.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, description="Returns at most this many balances, newest first"),
+        cursor: str | None = Query(None, description=f"Returns the page after the one with this {NEXT_CURSOR_HEADER}"),
+    ):
+        self.limit = limit
+        self.before = None if cursor is None else decode_cursor(cursor)
+
+    @property
+    def is_paginated(self) -> bool:
+        return self.limit is not None or self.before is not None
+
+    def last_day(self, end: date | None) -> date | None:
+        """The last day the balances of this page can be on, to only load the balances up to it"""
+        if self.before is None:
+            return end
+        return self.before if end is None else min(end, self.before)
+
+    def paginate(self, selected: SelectedBalances) -> tuple[SelectedBalances, str | None]:
+        """
+        Returns the page of the selected balances, newest first, and the cursor of the next page if there is one
+        """
+        if not self.is_paginated:
+            return selected, None
+        last = selected.days.size if self.before is None else int(np.searchsorted(selected.days, self.before.toordinal()))
+        first = 0 if self.limit is None else max(last - self.limit, 0)
+        page = SelectedBalances(
+            selected.currency,
+            selected.days[first:last][::-1],
+            selected.amount[first:last][::-1],
+            selected.amount_in_euro[first:last][::-1],
+        )
+        if first == 0:
+            return page, None
+        return page, encode_cursor(date.fromordinal(int(selected.days[first])))
+
+
+def encode_cursor(before: date) -> str:
+    return base64.urlsafe_b64encode(before.isoformat().encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> date:
+    try:
+        return date.fromisoformat(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, {"cursor": "Not a valid cursor"}) from e
@@ -0,0 +1,162 @@
+import gzip
+import zlib
+from datetime import date
+from typing import Any, AsyncIterable, AsyncIterator, Iterator, NamedTuple
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+from wealth.parameters.constants import Currency
+from wealth.parameters.general import BalanceFormat
+
+from .cache import LruCache
+from .parameters import RESPONSE_CACHE_COMPRESS_LEVEL, RESPONSE_CACHE_MAX_AGE, RESPONSE_CACHE_MAX_BYTES
+from .timeseries import to_iso_dates
+
+# The most balances serialized at once by BalanceStreamingResponse
+STREAM_CHUNK_SIZE = 1024
+# Makes zlib write a gzip header and trailer
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# The gzipped bodies of the streamed balance routes, keyed by their ETag,
+# which changes with the user, the route, the query parameters, the data version and the day
+response_cache: LruCache[str, bytes] = LruCache(RESPONSE_CACHE_MAX_BYTES, len, max_age=RESPONSE_CACHE_MAX_AGE)
+
+
+class SelectedBalances(NamedTuple):
+    """The balances of one asset on the given day ordinals"""
+
+    currency: Currency
+    days: np.ndarray
+    amount: np.ndarray
+    amount_in_euro: np.ndarray
+
+
+class BalanceResponse(JSONResponse):
+    """
+    Serializes balances straight from their arrays to JSON, as a list of WealthItems or of ColumnarBalances.
+    Skips validating every balance against the response model, which is only used to document the schema.
+    """
+
+    def __init__(
+        self,
+        content: list[SelectedBalances],
+        balance_format: BalanceFormat = BalanceFormat.items,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+    ):
+        self.balance_format = balance_format
+        super().__init__(content, status_code, headers)
+
+    def render(self, content: Any) -> bytes:
+        return render_balances(content, self.balance_format)
+
+
+class BalanceStreamingResponse(StreamingResponse):
+    """
+    Streams the same JSON as BalanceResponse while the balances are materialized asset by asset,
+    in chunks of at most STREAM_CHUNK_SIZE balances, so a long history is never serialized at once.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        balances: AsyncIterable[SelectedBalances],
+        balance_format: BalanceFormat = BalanceFormat.items,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        cache_key: str | None = None,
+    ):
+        chunks = _stream(balances, balance_format)
+        if cache_key is not None:
+            chunks = _cache_gzipped(chunks, cache_key)
+        super().__init__(chunks, status_code, headers, media_type="application/json")
+
+
+class GzippedResponse(Response):
+    """
+    Sends a JSON body that is already gzipped, like the ones in response_cache.
+    It is only decompressed for the clients that do not accept gzip.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, gzipped: bytes, status_code: int = 200, headers: dict[str, str] | None = None):
+        super().__init__(gzipped, status_code, headers)
+        self.headers["Content-Encoding"] = "gzip"
+        self.headers.add_vary_header("Accept-Encoding")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if "gzip" not in Headers(scope=scope).get("Accept-Encoding", ""):
+            self.body = gzip.decompress(self.body)
+            del self.headers["Content-Encoding"]
+            self.headers["Content-Length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
+
+
+def render_balances(balances: list[SelectedBalances], balance_format: BalanceFormat) -> bytes:
+    if balance_format == BalanceFormat.columnar:
+        return orjson.dumps([_to_columns(selected) for selected in balances], option=orjson.OPT_SERIALIZE_NUMPY)
+    return orjson.dumps(
+        [
+            {"date": day, "amount": amount, "amount_in_euro": amount_in_euro, "currency": selected.currency.value}
+            for selected in balances
+            for day, amount, amount_in_euro in zip(
+                to_iso_dates(selected.days), selected.amount.tolist(), selected.amount_in_euro.tolist()
+            )
+        ]
+    )
+
+
+async def _stream(balances: AsyncIterable[SelectedBalances], balance_format: BalanceFormat) -> AsyncIterator[bytes]:
+    separator = b"["
+    async for selected in balances:
+        for chunk in _chunks(selected, balance_format):
+            # Each chunk is rendered as a list, its brackets are replaced by the ones of the whole array
+            yield separator + render_balances([chunk], balance_format)[1:-1]
+            separator = b","
+    yield b"]" if separator == b"," else b"[]"
+
+
+async def _cache_gzipped(chunks: AsyncIterator[bytes], key: str) -> AsyncIterator[bytes]:
+    """
+    Passes the chunks on while gzipping them, and stores the gzipped body in response_cache once all are sent.
+    Nothing is stored when the stream fails or is cut off, or when the body gets too big for the cache.
+    """
+    compressor = zlib.compressobj(RESPONSE_CACHE_COMPRESS_LEVEL, zlib.DEFLATED, _GZIP_WBITS)
+    gzipped: list[bytes] | None = []
+    size = 0
+    async for chunk in chunks:
+        if gzipped is not None:
+            gzipped.append(compressor.compress(chunk))
+            size += len(gzipped[-1])
+            if size > response_cache.max_bytes:
+                gzipped = None
+        yield chunk
+    if gzipped is not None:
+        gzipped.append(compressor.flush())
+        response_cache.set(key, b"".join(gzipped))
+
+
+def _chunks(selected: SelectedBalances, balance_format: BalanceFormat) -> Iterator[SelectedBalances]:
+    if balance_format == BalanceFormat.columnar:
+        yield selected
+        return
+    for first in range(0, selected.days.size, STREAM_CHUNK_SIZE):
+        last = first + STREAM_CHUNK_SIZE
+        yield SelectedBalances(
+            selected.currency, selected.days[first:last], selected.amount[first:last], selected.amount_in_euro[first:last]
+        )
+
+
+def _to_columns(selected: SelectedBalances) -> dict[str, Any]:
+    days = selected.days.astype(np.int64)
+    return {
+        "currency": selected.currency.value,
+        "start": date.fromordinal(int(days[0])) if days.size else None,
+        "dates": days - days[0] if days.size else days,
+        "amount": np.ascontiguousarray(selected.amount, dtype=np.float64),
+        "amount_in_euro": np.ascontiguousarray(selected.amount_in_euro, dtype=np.float64),
+    }
@@ -0,0 +1,129 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from wealth.parameters.general import Aggregation, Resolution
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def to_day_ordinal(value: date) -> int:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal()
+
+
+def from_day_ordinal(ordinal: int) -> datetime:
+    return datetime.fromordinal(ordinal)
+
+
+def to_iso_dates(ordinals: np.ndarray) -> list[str]:
+    """Formats the day ordinals as YYYY-MM-DD"""
+    return (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]").astype(str).tolist()
+
+
+def day_axis(start: date, end: date) -> np.ndarray:
+    """
+    Returns the day ordinals from start up to and including end
+    """
+    return np.arange(to_day_ordinal(start), to_day_ordinal(end) + 1, dtype=np.int64)
+
+
+def forward_fill(ordinals: np.ndarray, values: np.ndarray, axis: np.ndarray, *, max_attempts: int | None = None) -> np.ndarray:
+    """
+    Aligns the values, observed on the given day ordinals, on the axis.
+    Each day gets the value of the latest observation on or before it.
+    With max_attempts, an observation is only used up to max_attempts - 1 days after it,
+    which matches get_rate_at_date.
+    Days without a usable observation are NaN.
+    When the same day is observed more than once, the last observation wins.
+    """
+    filled = np.full(axis.shape, np.nan)
+    if not ordinals.size:
+        return filled
+    order = np.argsort(ordinals, kind="stable")
+    sorted_ordinals = ordinals[order]
+    sorted_values = np.asarray(values, dtype=np.float64)[order]
+
+    positions = np.searchsorted(sorted_ordinals, axis, side="right") - 1
+    known = positions >= 0
+    if max_attempts is not None:
+        known &= axis - sorted_ordinals[positions.clip(0)] < max_attempts
+    filled[known] = sorted_values[positions[known]]
+    return filled
+
+
+def period_starts(ordinals: np.ndarray, resolution: Resolution) -> np.ndarray:
+    """
+    Returns the day ordinal of the first day of the period every day falls in.
+    Weeks start on Monday.
+    """
+    if resolution == Resolution.daily:
+        return ordinals
+    if resolution == Resolution.weekly:
+        # Day ordinal 1 is a Monday
+        return ordinals - (ordinals - 1) % 7
+    unit = "M" if resolution == Resolution.monthly else "Y"
+    days = (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]")
+    return days.astype(f"datetime64[{unit}]").astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+
+
+def downsample(
+    ordinals: np.ndarray, columns: list[np.ndarray], resolution: Resolution, aggregation: Aggregation
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Reduces the values on the sorted day ordinals to one value per period, either its last value or its mean.
+    Every period is labelled with the last of its days.
+    """
+    if resolution == Resolution.daily or not ordinals.size:
+        return ordinals, columns
+    periods = period_starts(ordinals, resolution)
+    starts = np.flatnonzero(np.concatenate(([True], periods[1:] != periods[:-1])))
+    ends = np.append(starts[1:], ordinals.size) - 1
+    if aggregation == Aggregation.last:
+        return ordinals[ends], [c[ends] for c in columns]
+    counts = ends - starts + 1
+    return ordinals[ends], [np.add.reduceat(c, starts) / counts for c in columns]
+
+
+class DailySeries:
+    """
+    A value for every day, stored as one contiguous array starting on the day ordinal start.
+    Days without a value are NaN.
+    """
+
+    __slots__ = ("start", "values")
+
+    def __init__(self, start: int, values: np.ndarray):
+        self.start = start
+        self.values = values
+
+    @classmethod
+    def from_observations(cls, ordinals: np.ndarray, values: np.ndarray, *, max_attempts: int | None = None) -> "DailySeries":
+        """
+        Forward fills the observations once, from the first observed day until the last day it can be used on
+        """
+        if not ordinals.size:
+            return cls(0, np.empty(0))
+        start = int(ordinals.min())
+        end = int(ordinals.max()) + (max_attempts - 1 if max_attempts is not None else 0)
+        axis = np.arange(start, end + 1, dtype=np.int64)
+        return cls(start, forward_fill(ordinals, values, axis, max_attempts=max_attempts))
+
+    @property
+    def end(self) -> int:
+        """The last day ordinal in the series"""
+        return self.start + len(self.values) - 1
+
+    def at(self, ordinal: int) -> float:
+        index = ordinal - self.start
+        if index < 0 or index >= len(self.values):
+            return np.nan
+        return float(self.values[index])
+
+    def take(self, ordinals: np.ndarray) -> np.ndarray:
+        indices = ordinals - self.start
+        inside = (indices >= 0) & (indices < len(self.values))
+        taken = np.full(ordinals.shape, np.nan)
+        taken[inside] = self.values[indices[inside]]
+        return taken
@@ -1,5 +1,33 @@
+from datetime import date
 from enum import Enum
 
+from pydantic import BaseModel
+
+from wealth.parameters.constants import Currency
+
 
 class StringedEnum(str, Enum):
     pass
+
+
+class ColumnarBalances(BaseModel):
+    """The balances of one asset column by column, the balance on start + dates[i] days is amount[i]"""
+
+    currency: Currency
+    start: date | None
+    dates: list[int]
+    amount: list[float]
+    amount_in_euro: list[float]
+
+
+class WealthItem(BaseModel):
+    date: date
+    amount: float
+    amount_in_euro: float = 0
+    currency: Currency
+
+
+class Balances(BaseModel):
+    """A list of balances, or with format=columnar one ColumnarBalances per asset"""
+
+    __root__: list[WealthItem] | list[ColumnarBalances]